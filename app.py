@@ -1,22 +1,47 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File, Depends, Query, HTTPException, Response
-from fastapi.responses import RedirectResponse, JSONResponse, FileResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+import startup_timing
+from fastapi import FastAPI, Request, Form, UploadFile, File, Depends, Query, HTTPException, Response, Body
+from fastapi.responses import RedirectResponse, JSONResponse, ORJSONResponse, HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+startup_timing.mark("import fastapi")
 from sqlalchemy.orm import Session
-from typing import List, Dict
-import pandas as pd
-import threading, time, requests, os, signal, hashlib, hmac
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select, update, values, column, literal, text, tuple_, Integer, String, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+startup_timing.mark("import sqlalchemy")
+from typing import Any, List, Dict, NamedTuple
+from pydantic import BaseModel, StrictInt, StrictStr, ValidationError
+import threading, time, os, hashlib, hmac, asyncio, itertools, tempfile
+import orjson
 from datetime import datetime
 import re
-from openpyxl.styles import Font, PatternFill
-
-from config import get_db, engine, Base, init_db
-from model import Student, Visit, Product
-from system_admin import School, create_school_database, list_all_schools, delete_school_database, get_school_database_info
+from urllib.parse import quote
+# pandas, openpyxl and requests are imported where they are used (Excel import/export, keep_awake)
+# so workers that never touch those paths don't pay for loading them
+
+from config import get_db, get_async_db, engine, async_engine, replica_engine, replica_async_engine, SessionLocal, AsyncSessionLocal, STUDENT_SEARCH_BACKEND
+startup_timing.mark("import config (engines)")
+from model import Student, Visit, VisitArchive, VisitHistory, Product, VisitChange, VisitCount, RosterChange
+from system_admin import School, create_school_database, list_all_schools, delete_school_database
+startup_timing.mark("import models")
+from live_feed import visit_feed, format_sse
+from search_index import StudentSearchCache
+from cache import TTLCache
+from cache_bus import cache_bus
+from migrations import ensure_schema
+import metrics
+import query_profiler
+from archive import visit_source, start_archiver, VISIT_CHANGE_RETENTION_DAYS
+from write_behind import GroupCommitQueue, QueueFull
+import read_replica
+from read_replica import get_read_db, get_async_read_db
+from compression import CompressionMiddleware
+from static_assets import FingerprintedStaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+startup_timing.mark("import app modules")
 
-# Initialize database tables on startup (creates all tables if they don't exist)
-init_db()
+# Bring the database schema up to date (a single version check when nothing is pending)
+ensure_schema()
+startup_timing.mark("schema version check")
 
 app = FastAPI(title="School Visit Management System")
 app.add_middleware(
@@ -27,9 +52,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Templates & static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Templates & static files; templates link assets with static_url() to get their fingerprinted URL
+static_files = FingerprintedStaticFiles(directory="static", mount_path="/static")
+app.mount("/static", static_files, name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_files.url
+
+if startup_timing.ENABLED:
+    @app.middleware("http")
+    async def _first_request_timing(request: Request, call_next):
+        response = await call_next(request)
+        startup_timing.first_request()
+        return response
+
+# Request/DB metrics are only collected when METRICS_TOKEN is set; scrapers send it as a Bearer token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+if METRICS_TOKEN:
+    metrics.instrument_engine(engine, "sync")
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+    if read_replica.ENABLED:
+        metrics.instrument_engine(replica_engine, "replica")
+        metrics.instrument_engine(replica_async_engine.sync_engine, "replica_async")
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Development only: QUERY_PROFILE=1 counts statements per request and flags N+1 patterns
+if query_profiler.ENABLED:
+    query_profiler.instrument_engine(engine)
+    query_profiler.instrument_engine(async_engine.sync_engine)
+    if read_replica.ENABLED:
+        query_profiler.instrument_engine(replica_engine)
+        query_profiler.instrument_engine(replica_async_engine.sync_engine)
+    app.add_middleware(query_profiler.QueryProfilerMiddleware)
+
+# REPLICA_DATABASE_URL: read-only routes use the replica unless their school just wrote
+if read_replica.ENABLED:
+    app.add_middleware(read_replica.ReadYourWritesMiddleware)
+
+# Outermost: gzip/brotli for JSON and HTML bodies of at least COMPRESS_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+
+MAX_PAGE_SIZE = 1000  # cap on ``limit`` for paginated listings
 
 # ==================== AUTH HELPERS ====================
 
@@ -44,15 +106,313 @@ def _check_admin(request: Request, school_name: str) -> bool:
     return token == _make_token(school_name)
 
 
-# In-memory school cache to avoid repeated DB lookups
-_school_cache: dict = {}
+# ==================== SCHOOL RESOLVER ====================
+
+class SchoolInfo(NamedTuple):
+    """Cached, session-independent view of a School row"""
+    id: int
+    school_name: str
+    school_code: str
+
+
+# In-memory school cache to avoid repeated DB lookups; entries are dropped
+# when a school is created or deleted and expire after SCHOOL_CACHE_TTL
+SCHOOL_CACHE_TTL = int(os.getenv("SCHOOL_CACHE_TTL", "300"))
+_school_cache = TTLCache(max_size=1024, ttl=SCHOOL_CACHE_TTL)
+
+async def _get_school(school_name: str):
+    school = _school_cache.get(school_name)
+    if school is None:
+        # Own short-lived session, so no connection stays checked out for the request
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(School.id, School.school_name, School.school_code).where(School.school_name == school_name)
+            )).first()
+        if row:
+            school = SchoolInfo(row.id, row.school_name, row.school_code)
+            _school_cache.set(school_name, school)
+    return school
+
+
+async def get_school(school_name: str) -> SchoolInfo:
+    """Dependency resolving the ``{school_name}`` path parameter, 404 if unknown"""
+    school = await _get_school(school_name)
+    if not school:
+        raise HTTPException(status_code=404, detail="School not found")
+    return school
+
+
+def _for_school(entity, school_id: int):
+    """The tenant filter: every query scoping rows to one school goes through this one predicate.
+
+    Cross-school reports (e.g. the system admin's totals) join on school_id instead.
+    """
+    return entity.school_id == school_id
+
+
+def _load_search_roster(school_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(Student.id, Student.student_name, Student.class_name).filter(
+            _for_school(Student, school_id)
+        ).all()
+    finally:
+        db.close()
+
+
+student_search = StudentSearchCache(_load_search_roster)
+
+# Serialized product lists per school, dropped (in every worker) when a school's products change
+_products_cache = TTLCache(max_size=1024, ttl=SCHOOL_CACHE_TTL)
 
-def _get_school(school_name: str, db: Session):
-    if school_name not in _school_cache:
-        school = db.query(School).filter(School.school_name == school_name).first()
-        if school:
-            _school_cache[school_name] = {"id": school.id, "school_code": school.school_code, "school_name": school.school_name}
-    return _school_cache.get(school_name)
+cache_bus.subscribe("school", _school_cache.invalidate, _school_cache.clear)
+cache_bus.subscribe("roster", student_search.invalidate, student_search.clear)
+cache_bus.subscribe("products", _products_cache.invalidate, _products_cache.clear)
+cache_bus.start()
+
+
+def _is_sos_school(school) -> bool:
+    return (
+        (school.school_code or "").strip().lower() == "sos"
+        or "sos" in (school.school_name or "").strip().lower()
+    )
+
+
+def _clean_visit_fields(is_sos_school: bool, visit_type: str, movement_method: str | None, plate_number: str | None):
+    """Validate a visit submission; returns (error, movement_method, plate_number)."""
+    if visit_type not in {"visit_day", "parent_meeting"}:
+        return "Invalid visit type", None, None
+
+    movement_method_clean = None
+    plate_number_clean = None
+    if is_sos_school:
+        movement_method_clean = (movement_method or "").strip().lower()
+        if movement_method_clean not in {"with_car", "without_car"}:
+            return "Please select movement method", None, None
+
+        if movement_method_clean == "with_car":
+            plate_number_clean = (plate_number or "").strip().upper()
+            if not plate_number_clean:
+                return "Plate number is required", None, None
+
+            # Normalize by stripping spaces and validate format: RA + letter + 3 digits + letter (e.g. REA 123A)
+            plate_number_clean = re.sub(r"\s+", "", plate_number_clean)
+            if not re.match(r"^RA[A-Z]\d{3}[A-Z]$", plate_number_clean):
+                return "Plate number must be in the format RAx 123A (start with RA, then a letter, 3 digits, and a letter).", None, None
+
+    return None, movement_method_clean, plate_number_clean
+
+
+def _excel_text(value):
+    """Normalise a non-empty spreadsheet cell to stripped text; None when blank"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _visit_row(visit, student_name: str, class_name: str) -> dict:
+    """Serialize a visit the way admin_data lists it, plus its class"""
+    return {
+        "student_name": student_name,
+        "class_name": class_name,
+        "date": visit.visit_date.strftime("%Y-%m-%d"),
+        "timestamp": visit.created_at.isoformat() if visit.created_at else None,
+        "id": visit.id,
+        "movement_method": visit.movement_method,
+        "arrival_plate_number": visit.arrival_plate_number,
+        "assigned_plate_number": visit.assigned_plate_number,
+    }
+
+
+def _publish_visit_added(school_id: int, visit, student_name: str, class_name: str):
+    visit_feed.publish(school_id, visit.visit_type, {
+        "type": "visit_added",
+        "visit": _visit_row(visit, student_name, class_name),
+    })
+
+
+def _insert_visits(visits: list):
+    """INSERT ... ON CONFLICT DO NOTHING for transient Visit objects, returning inserted ids.
+
+    The same statement logs each inserted visit as an "inserted" VisitChange.
+    """
+    columns = ("student_id", "visit_type", "visit_date", "status", "movement_method", "arrival_plate_number", "created_at")
+    # Key order, so concurrent batches wait on each other's unique-index entries instead of deadlocking
+    # (stable: within a batch the first of repeated keys still wins)
+    visits = sorted(visits, key=lambda visit: (visit.student_id, visit.visit_type, visit.visit_date))
+    inserted = pg_insert(Visit).values([
+        {column: getattr(visit, column) for column in columns} for visit in visits
+    ]).on_conflict_do_nothing(
+        index_elements=["student_id", "visit_type", "visit_date"]
+    ).returning(
+        Visit.id, Visit.student_id, Visit.visit_type, Visit.visit_date, Visit.created_at
+    ).cte("inserted")
+    logged = insert(VisitChange).from_select(
+        ["school_id", "visit_id", "visit_type", "visit_date", "action", "created_at"],
+        select(
+            Student.school_id, inserted.c.id, inserted.c.visit_type, inserted.c.visit_date,
+            literal("inserted"), inserted.c.created_at
+        ).join(Student, Student.id == inserted.c.student_id)
+    ).cte("logged")
+    return select(inserted.c.id, inserted.c.student_id, inserted.c.visit_type, inserted.c.visit_date).add_cte(logged)
+
+
+def _visit_count_changes(school_id: int, entries, sign: int = 1) -> list:
+    """Statements adding (sign=1) or removing (sign=-1) visits from visit_counts.
+
+    ``entries`` are (class_name, visit) pairs; run the statements in the same
+    transaction as the visit insert/delete so the counters never drift.
+    """
+    deltas = {}
+    for class_name, visit in entries:
+        key = (school_id, class_name, visit.visit_type, visit.visit_date)
+        total, with_car, without_car = deltas.get(key, (0, 0, 0))
+        deltas[key] = (
+            total + 1,
+            with_car + (visit.movement_method == "with_car"),
+            without_car + (visit.movement_method == "without_car"),
+        )
+    if not deltas:
+        return []
+    # Rows are locked in key order, so concurrent batches touching the same counters can't deadlock
+    deltas = sorted(deltas.items())
+
+    if sign > 0:
+        stmt = pg_insert(VisitCount).values([
+            {
+                "school_id": key[0], "class_name": key[1], "visit_type": key[2], "visit_date": key[3],
+                "total": total, "with_car": with_car, "without_car": without_car,
+            }
+            for key, (total, with_car, without_car) in deltas
+        ])
+        return [stmt.on_conflict_do_update(
+            index_elements=["school_id", "class_name", "visit_type", "visit_date"],
+            set_={
+                "total": VisitCount.total + stmt.excluded.total,
+                "with_car": VisitCount.with_car + stmt.excluded.with_car,
+                "without_car": VisitCount.without_car + stmt.excluded.without_car,
+            },
+        )]
+
+    # One UPDATE ... FROM (VALUES ...) for all groups, however many dates the visits span
+    delta = values(
+        column("class_name", String), column("visit_type", String), column("visit_date", Date),
+        column("total", Integer), column("with_car", Integer), column("without_car", Integer),
+        name="delta",
+    ).data([key[1:] + counts for key, counts in deltas])
+    # UPDATE ... FROM has no defined row order: take the row locks first, in the same (byte) key order
+    lock = select(VisitCount.school_id).where(
+        _for_school(VisitCount, school_id),
+        tuple_(VisitCount.class_name, VisitCount.visit_type, VisitCount.visit_date).in_([key[1:] for key, _ in deltas]),
+    ).order_by(
+        VisitCount.class_name.collate("C"), VisitCount.visit_type.collate("C"), VisitCount.visit_date
+    ).with_for_update()
+    return [
+        lock,
+        update(VisitCount).where(
+            _for_school(VisitCount, school_id),
+            VisitCount.class_name == delta.c.class_name,
+            VisitCount.visit_type == delta.c.visit_type,
+            VisitCount.visit_date == delta.c.visit_date,
+        ).values(
+            total=VisitCount.total - delta.c.total,
+            with_car=VisitCount.with_car - delta.c.with_car,
+            without_car=VisitCount.without_car - delta.c.without_car,
+        )
+    ]
+
+
+def _record_visit_change(db: Session, school_id: int, visit, action: str):
+    """Log a deleted/updated visit so incremental admin_data clients pick it up (inserts log themselves)"""
+    db.add(VisitChange(
+        school_id=school_id,
+        visit_id=visit.id,
+        visit_type=visit.visit_type,
+        visit_date=visit.visit_date,
+        action=action,
+    ))
+
+
+def _record_roster_changes(db: Session, school_id: int, student_ids: list, action: str):
+    """Log roster additions/removals for /students/sync"""
+    if student_ids:
+        db.execute(insert(RosterChange), [
+            {"school_id": school_id, "student_id": student_id, "action": action}
+            for student_id in student_ids
+        ])
+
+
+class VisitCursor(NamedTuple):
+    """admin_data delta cursor, sent as '<watermark>.<issued_at>'"""
+    watermark: int  # every transaction with a lower id had finished when the cursor was issued
+    issued_at: int  # unix time; older cursors than the visit_changes retention need a full resync
+
+    def __str__(self):
+        return f"{self.watermark}.{self.issued_at}"
+
+
+# Margin for transactions that were logging changes while a cursor was issued
+VISIT_CURSOR_MAX_AGE = VISIT_CHANGE_RETENTION_DAYS * 86400 - 3600
+
+
+async def _snapshot_watermark(db: AsyncSession) -> int:
+    """Oldest transaction id still running: changes logged below it are all visible from now on.
+
+    Read it before the data it should cover.
+    """
+    return (await db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))).scalar()
+
+
+async def _visit_cursor(db: AsyncSession) -> VisitCursor:
+    """A cursor for the current snapshot; read it before the data it should cover"""
+    return VisitCursor(await _snapshot_watermark(db), int(time.time()))
+
+
+def _parse_visit_cursor(value: str | None):
+    """Parse a cursor (bare or as an ETag); None if invalid or too old to serve a delta for"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        cursor = VisitCursor(*map(int, value.strip('"').split(".")))
+    except (TypeError, ValueError):
+        return None
+    if cursor.issued_at < time.time() - VISIT_CURSOR_MAX_AGE:
+        return None
+    return cursor
+
+
+def _group_visits_by_class(rows) -> dict:
+    result = {}
+    for r in rows:
+        cls = r.class_name
+        if cls not in result:
+            result[cls] = []
+        result[cls].append({
+            "student_name": r.student_name,
+            "date": r.visit_date.strftime("%Y-%m-%d"),
+            "timestamp": r.created_at.isoformat() if r.created_at else None,
+            "id": r.id,
+            "movement_method": r.movement_method,
+            "arrival_plate_number": r.arrival_plate_number,
+            "assigned_plate_number": r.assigned_plate_number,
+        })
+    return result
+
+
+# ==================== METRICS ====================
+
+@app.get("/metrics")
+def metrics_endpoint(request: Request):
+    """Prometheus scrape endpoint; 404 unless METRICS_TOKEN is configured"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 # ==================== SYSTEM ADMIN ENDPOINTS ====================
@@ -89,6 +449,7 @@ def create_new_school(
     
     # Create school-specific database
     result = create_school_database(school_name, school_code)
+    cache_bus.publish("school", school_name)
     
     if result["status"] == "success":
         return {
@@ -102,6 +463,7 @@ def create_new_school(
         # Rollback if database creation fails
         db.delete(school)
         db.commit()
+        cache_bus.publish("school", school_name)
         return result
 
 
@@ -125,6 +487,30 @@ def get_all_schools(db: Session = Depends(get_db)):
     }
 
 
+# System Admin - Visit totals per school
+@app.get("/myadmin/stats")
+async def get_school_stats(visit_date: str | None = Query(None), db: AsyncSession = Depends(get_async_db)):
+    """Visit totals per school and visit type from the visit_counts aggregate"""
+    try:
+        target_date = _parse_stats_date(visit_date)
+    except ValueError:
+        return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}
+
+    stmt = select(
+        School.id, School.school_name, VisitCount.visit_type, func.sum(VisitCount.total).label("total")
+    ).join(VisitCount, VisitCount.school_id == School.id).where(
+        School.is_active == 1
+    ).group_by(School.id, School.school_name, VisitCount.visit_type)
+    if target_date:
+        stmt = stmt.where(VisitCount.visit_date == target_date)
+
+    schools = {}
+    for r in (await db.execute(stmt)).all():
+        entry = schools.setdefault(r.id, {"school_id": r.id, "school_name": r.school_name, "visit_day": 0, "parent_meeting": 0})
+        entry[r.visit_type] = int(r.total)
+    return {"status": "success", "schools": list(schools.values())}
+
+
 # System Admin - Delete school
 @app.delete("/myadmin/schools/{school_id}")
 def delete_school(school_id: int, db: Session = Depends(get_db)):
@@ -139,6 +525,9 @@ def delete_school(school_id: int, db: Session = Depends(get_db)):
     
     # Delete school-specific database
     result = delete_school_database(school.school_name)
+    cache_bus.publish("school", school.school_name)
+    cache_bus.publish("roster", school_id)
+    cache_bus.publish("products", school_id)
     
     return {
         "status": "success",
@@ -146,32 +535,62 @@ def delete_school(school_id: int, db: Session = Depends(get_db)):
     }
 
 
+# ==================== PAGE CACHE ====================
+
+class RenderedPage(NamedTuple):
+    """A template rendered for one school, with the strong ETag of its bytes"""
+    template: object  # the jinja2 Template, to notice edits when templates auto-reload
+    body: bytes
+    etag: str
+
+
+# Rendered pages per school name ({template name: RenderedPage}), dropped with the school's cache entry
+_page_cache = TTLCache(max_size=1024, ttl=SCHOOL_CACHE_TTL)
+cache_bus.subscribe("school", _page_cache.invalidate, _page_cache.clear)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _cached_page(request: Request, template_name: str, school_name: str, school: SchoolInfo,
+                 cache_control: str, **context) -> Response:
+    """Serve ``template_name`` for a school from _page_cache; 304 when If-None-Match has its ETag"""
+    pages = _page_cache.get(school_name)
+    if pages is None:
+        pages = {}
+        _page_cache.set(school_name, pages)
+    page = pages.get(template_name)
+    if page is None or (templates.env.auto_reload and not page.template.is_up_to_date):
+        template = templates.get_template(template_name)
+        body = template.render(school_name=school_name, school_code=school.school_code, **context).encode()
+        page = RenderedPage(template, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        pages[template_name] = page
+
+    headers = {"ETag": page.etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(page.body, headers=headers)
+
+
 # ==================== SCHOOL-SPECIFIC ENDPOINTS ====================
 
 # Parent chooses type for specific school
 @app.get("/{school_name}/parentportal")
-def parent_choice(school_name: str, request: Request, db: Session = Depends(get_db)):
-    """Parent portal for a specific school"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "school_name": school_name,
-        "school_code": school.school_code
-    })
+def parent_choice(school_name: str, request: Request, school: SchoolInfo = Depends(get_school)):
+    """Parent portal for a specific school (the QR code target); revalidated with its ETag"""
+    return _cached_page(request, "index.html", school_name, school, "public, no-cache")
 
 
 # Admin login page
 @app.get("/{school_name}/admin/login")
-def admin_login_page(school_name: str, request: Request, db: Session = Depends(get_db)):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
+def admin_login_page(school_name: str, request: Request, school: SchoolInfo = Depends(get_school)):
     if _check_admin(request, school_name):
         return RedirectResponse(f"/{school_name}/admin", status_code=302)
-    return templates.TemplateResponse("login.html", {"request": request, "school_name": school_name, "error": ""})
+    return _cached_page(request, "login.html", school_name, school, "private, no-cache", error="")
 
 
 @app.post("/{school_name}/admin/login")
@@ -180,11 +599,8 @@ def admin_login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school)
 ):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
     expected_user = school_name
     expected_pass = f"{school_name}001"
     if username == expected_user and password == expected_pass:
@@ -204,91 +620,221 @@ def admin_logout(school_name: str):
 
 # Admin dashboard for specific school
 @app.get("/{school_name}/admin")
-def admin_choice(school_name: str, request: Request, db: Session = Depends(get_db)):
+def admin_choice(school_name: str, request: Request, school: SchoolInfo = Depends(get_school)):
     """Admin dashboard for a specific school"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
     if not _check_admin(request, school_name):
         return RedirectResponse(f"/{school_name}/admin/login", status_code=302)
-    return templates.TemplateResponse("admin.html", {
-        "request": request,
-        "school_name": school_name,
-        "school_code": school.school_code
-    })
+    return _cached_page(request, "admin.html", school_name, school, "private, no-cache")
 
 
 # ==================== SCHOOL-SPECIFIC API ENDPOINTS ====================
 
-@app.get("/{school_name}/students/search", response_model=List[Dict])
-def search_students(school_name: str, q: str = Query(..., min_length=1), db: Session = Depends(get_db)):
-    school = _get_school(school_name, db)
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    query = db.query(Student.id, Student.student_name, Student.class_name).filter(
-        (Student.school_id == school["id"]) | (Student.school_id.is_(None)),
+# The hot list endpoints return ORJSONResponse objects directly, so FastAPI skips its
+# jsonable_encoder pass and the stdlib encoder (compare: python benchmark.py --serialization)
+@app.get("/{school_name}/students/search", response_class=ORJSONResponse)
+async def search_students(school_name: str, q: str = Query(..., min_length=1), school: SchoolInfo = Depends(get_school), db: AsyncSession = Depends(get_async_read_db)):
+    if STUDENT_SEARCH_BACKEND == "memory":
+        index = student_search.get(school.id)
+        if index is not None:
+            return ORJSONResponse(index.search(q, limit=20))
+
+    stmt = select(Student.id, Student.student_name, Student.class_name).where(
+        _for_school(Student, school.id),
         Student.student_name.ilike(f"%{q}%")
-    ).limit(20).all()
-    return [{"id": s.id, "student_name": s.student_name, "class_name": s.class_name} for s in query]
+    )
+    if STUDENT_SEARCH_BACKEND == "trigram":
+        stmt = stmt.order_by(func.similarity(Student.student_name, q).desc())
+    rows = (await db.execute(stmt.limit(20))).all()
+    return ORJSONResponse([{"id": s.id, "student_name": s.student_name, "class_name": s.class_name} for s in rows])
 
 
 @app.post("/{school_name}/visits/add")
-def add_visit(
+async def add_visit(
     school_name: str,
     student_id: int = Form(...),
     visit_type: str = Form(...),
     movement_method: str | None = Form(None),
     plate_number: str | None = Form(None),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a visit for a student in a specific school"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
     try:
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = (await db.execute(
+            select(Student.id, Student.school_id, Student.student_name, Student.class_name).where(Student.id == student_id)
+        )).first()
         if not student:
             return {"status": "error", "message": "Student not found"}
-        if student.school_id is not None and student.school_id != school.id:
+        if student.school_id != school.id:
             return {"status": "error", "message": "Student does not belong to this school"}
 
-        if visit_type not in {"visit_day", "parent_meeting"}:
-            return {"status": "error", "message": "Invalid visit type"}
+        error, movement_method_clean, plate_number_clean = _clean_visit_fields(
+            _is_sos_school(school), visit_type, movement_method, plate_number
+        )
+        if error:
+            return {"status": "error", "message": error}
 
-        is_sos_school = (
-            (school.school_code or "").strip().lower() == "sos"
-            or "sos" in (school.school_name or "").strip().lower()
+        visit = Visit(
+            student_id=student.id,
+            visit_type=visit_type,
+            visit_date=datetime.now().date(),
+            status="done",
+            movement_method=movement_method_clean,
+            arrival_plate_number=plate_number_clean,
+            created_at=datetime.utcnow(),
         )
+        if VISIT_WRITE_BEHIND:
+            # Release the connection while waiting for the group commit
+            await db.close()
+            try:
+                visit.id = await visit_writes.submit((school.id, student, visit))
+            except QueueFull:
+                return JSONResponse(
+                    {"status": "error", "message": "Too many visits at once, please try again"},
+                    status_code=503, headers={"Retry-After": "1"}
+                )
+            if visit.id is None:
+                return {"status": "error", "message": "Already recorded today"}
+            return {"status": "success", "visit_id": visit.id}
+
+        # The unique (student, type, date) index settles duplicates, including concurrent ones
+        visit.id = (await db.execute(_insert_visits([visit]))).scalar()
+        if visit.id is None:
+            await db.rollback()
+            return {"status": "error", "message": "Already recorded today"}
+        for stmt in _visit_count_changes(school.id, [(student.class_name, visit)]):
+            await db.execute(stmt)
+        await db.commit()
+        _publish_visit_added(school.id, visit, student.student_name, student.class_name)
+        return {"status": "success", "visit_id": visit.id}
+    except Exception as e:
+        await db.rollback()
+        return {"status": "error", "message": str(e)}
+
+
+async def _flush_visit_writes(items: list) -> list:
+    """Insert queued (school_id, student, visit) items in one transaction; returns each new id or None"""
+    async with AsyncSessionLocal() as db:
+        try:
+            inserted = {
+                (row.student_id, row.visit_type, row.visit_date): row.id
+                for row in (await db.execute(_insert_visits([visit for _, _, visit in items]))).all()
+            }
+            results, added = [], {}
+            for school_id, student, visit in items:
+                # Repeats inside one batch: only the first item of a key gets the inserted row
+                visit.id = inserted.pop((visit.student_id, visit.visit_type, visit.visit_date), None)
+                results.append(visit.id)
+                if visit.id is not None:
+                    added.setdefault(school_id, []).append((student, visit))
+            for school_id, entries in sorted(added.items(), key=lambda item: item[0]):
+                for stmt in _visit_count_changes(school_id, [(student.class_name, visit) for student, visit in entries]):
+                    await db.execute(stmt)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    for school_id, entries in added.items():
+        for student, visit in entries:
+            _publish_visit_added(school_id, visit, student.student_name, student.class_name)
+    return results
+
+
+# Optional group commit for /visits/add (VISIT_WRITE_BEHIND=1): requests still wait for their
+# own result, but concurrent check-ins share one transaction. A full queue answers 503.
+VISIT_WRITE_BEHIND = os.getenv("VISIT_WRITE_BEHIND", "0") == "1"
+visit_writes = GroupCommitQueue(
+    _flush_visit_writes,
+    max_batch=int(os.getenv("VISIT_WRITE_BATCH", "100")),
+    max_delay=int(os.getenv("VISIT_WRITE_DELAY_MS", "5")) / 1000,
+    max_pending=int(os.getenv("VISIT_WRITE_QUEUE_SIZE", "1000")),
+)
+
+
+MAX_VISIT_BATCH = 500
+
 
-        movement_method_clean = None
-        plate_number_clean = None
-        if is_sos_school:
-            movement_method_clean = (movement_method or "").strip().lower()
-            if movement_method_clean not in {"with_car", "without_car"}:
-                return {"status": "error", "message": "Please select movement method"}
-
-            if movement_method_clean == "with_car":
-                plate_number_clean = (plate_number or "").strip().upper()
-                if not plate_number_clean:
-                    return {"status": "error", "message": "Plate number is required"}
-
-                # Normalize by stripping spaces and validate format: RA + letter + 3 digits + letter (e.g. REA 123A)
-                plate_number_clean = re.sub(r"\s+", "", plate_number_clean)
-                if not re.match(r"^RA[A-Z]\d{3}[A-Z]$", plate_number_clean):
-                    return {"status": "error", "message": "Plate number must be in the format RAx 123A (start with RA, then a letter, 3 digits, and a letter)."}
-            else:
-                plate_number_clean = None
-
-        today = datetime.now().date()
-
-        existing = db.query(Visit).filter(
-            Visit.student_id == student.id,
-            Visit.visit_type == visit_type,
+class VisitBatchItem(BaseModel):
+    """One queued ``/visits/add`` submission; validated per item so one bad entry doesn't fail the batch"""
+    student_id: StrictInt
+    visit_type: StrictStr
+    movement_method: StrictStr | None = None
+    plate_number: StrictStr | None = None
+    key: Any = None
+
+
+@app.post("/{school_name}/visits/add-batch")
+def add_visits_batch(
+    school_name: str,
+    visits: List[Dict] = Body(..., embed=True),
+    school: SchoolInfo = Depends(get_school),
+    db: Session = Depends(get_db)
+):
+    """Record a batch of queued visits in one transaction.
+
+    Each item carries the same fields as the ``/visits/add`` form plus an
+    optional ``key`` that is echoed back, so offline clients can clear their
+    queue entries from the per-item results.
+    """
+    if len(visits) > MAX_VISIT_BATCH:
+        return JSONResponse({"status": "error", "message": f"At most {MAX_VISIT_BATCH} visits per batch"}, status_code=413)
+
+    items = []
+    for item in visits:
+        try:
+            items.append(VisitBatchItem.model_validate(item))
+        except ValidationError as e:
+            items.append(e)
+    student_ids = {item.student_id for item in items if isinstance(item, VisitBatchItem)}
+
+    students = {}
+    if student_ids:
+        students = {
+            s.id: s for s in db.query(
+                Student.id, Student.school_id, Student.student_name, Student.class_name
+            ).filter(Student.id.in_(student_ids)).all()
+        }
+
+    today = datetime.now().date()
+    recorded = set()
+    if students:
+        recorded = set(db.query(Visit.student_id, Visit.visit_type).filter(
+            Visit.student_id.in_(students.keys()),
             Visit.visit_date == today
-        ).first()
-        if existing:
-            return {"status": "error", "message": "Already recorded today"}
+        ).all())
+
+    is_sos = _is_sos_school(school)
+    results = []
+    pending = []
+    for index, (raw, item) in enumerate(zip(visits, items)):
+        result = {"index": index, "key": raw.get("key")}
+        results.append(result)
+
+        if isinstance(item, ValidationError):
+            field = ".".join(str(part) for part in item.errors()[0]["loc"])
+            result.update(status="error", message=f"Invalid {field}")
+            continue
+        student = students.get(item.student_id)
+        if not student:
+            result.update(status="error", message="Student not found")
+            continue
+        if student.school_id != school.id:
+            result.update(status="error", message="Student does not belong to this school")
+            continue
+
+        visit_type = item.visit_type
+        error, movement_method_clean, plate_number_clean = _clean_visit_fields(
+            is_sos, visit_type, item.movement_method, item.plate_number
+        )
+        if error:
+            result.update(status="error", message=error)
+            continue
+
+        if (student.id, visit_type) in recorded:
+            result.update(status="error", message="Already recorded today")
+            continue
+        recorded.add((student.id, visit_type))
 
         visit = Visit(
             student_id=student.id,
@@ -297,65 +843,243 @@ def add_visit(
             status="done",
             movement_method=movement_method_clean,
             arrival_plate_number=plate_number_clean,
+            created_at=datetime.utcnow(),
         )
-        db.add(visit)
-        db.commit()
-        return {"status": "success", "visit_id": visit.id}
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
+        pending.append((result, visit, student))
 
+    if pending:
+        try:
+            inserted = {
+                (row.student_id, row.visit_type, row.visit_date): row.id
+                for row in db.execute(_insert_visits([visit for _, visit, _ in pending]))
+            }
+            # Rows missing from RETURNING were recorded concurrently by another request
+            for result, visit, _ in pending:
+                visit.id = inserted.get((visit.student_id, visit.visit_type, visit.visit_date))
+                if visit.id is None:
+                    result.update(status="error", message="Already recorded today")
+                else:
+                    result.update(status="success", visit_id=visit.id)
+            pending = [p for p in pending if p[1].id is not None]
+            for stmt in _visit_count_changes(school.id, [(student.class_name, visit) for _, visit, student in pending]):
+                db.execute(stmt)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for result, _, _ in pending:
+                result.update(status="error", message=str(e))
+                result.pop("visit_id", None)
+            pending = []
+
+    for _, visit, student in pending:
+        _publish_visit_added(school.id, visit, student.student_name, student.class_name)
 
-@app.get("/{school_name}/admin/data/{visit_type}")
-def admin_data(school_name: str, visit_type: str, visit_date: str | None = Query(None), db: Session = Depends(get_db)):
-    school = _get_school(school_name, db)
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
+    return {
+        "status": "success",
+        "added": len(pending),
+        "results": results,
+    }
 
-    query = db.query(
-        Visit.id, Visit.visit_date, Visit.created_at,
-        Visit.movement_method, Visit.arrival_plate_number, Visit.assigned_plate_number,
-        Student.student_name, Student.class_name
-    ).join(Student).filter(
-        Visit.visit_type == visit_type,
-        (Student.school_id == school["id"]) | (Student.school_id.is_(None))
-    )
 
+@app.get("/{school_name}/admin/data/{visit_type}", response_class=ORJSONResponse)
+async def admin_data(
+    school_name: str,
+    visit_type: str,
+    request: Request,
+    visit_date: str | None = Query(None),
+    since: str | None = Query(None),
+    limit: int | None = Query(None, ge=1),
+    after: int | None = Query(None),
+    class_name: str | None = Query(None),
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Visits of a type grouped by class.
+
+    Every response carries a ``cursor`` (also sent as the ETag). Passing it
+    back as ``since`` returns only visits added or updated since then plus
+    the ids ``deleted`` since then; ``If-None-Match`` or an unchanged
+    ``since`` yields 304 Not Modified. Deltas may repeat rows the client
+    already has; a cursor older than the change log's retention gets a full
+    response.
+
+    The cursor is the oldest transaction still running when it was issued,
+    so a long write transaction (a roster upload, the archiver) holds it
+    back: until that transaction ends, each delta re-sends everything logged
+    since it began.
+
+    With ``limit``, visits come one page at a time, newest id first, without
+    ``stats``; pass ``next_after`` back as ``after`` for the next page.
+    """
+    target_date = None
     if visit_date:
         try:
             target_date = datetime.strptime(visit_date, "%Y-%m-%d").date()
-            query = query.filter(Visit.visit_date == target_date)
         except ValueError:
             pass
 
-    rows = query.order_by(Visit.visit_date.desc(), Visit.id.desc()).all()
+    # Recent dates read the hot table only; historic and all-date views include visits_archive
+    V = visit_source(target_date)
+    query = select(
+        V.id, V.visit_date, V.created_at,
+        V.movement_method, V.arrival_plate_number, V.assigned_plate_number,
+        Student.student_name, Student.class_name
+    ).join(Student, Student.id == V.student_id).where(
+        V.visit_type == visit_type,
+        _for_school(Student, school.id)
+    )
+    change_filters = [_for_school(VisitChange, school.id), VisitChange.visit_type == visit_type]
+    if class_name:
+        query = query.where(Student.class_name == class_name)
+    if target_date:
+        query = query.where(V.visit_date == target_date)
+        change_filters.append(VisitChange.visit_date == target_date)
+
+    # Browsers revalidate with If-None-Match instead of reusing a stale copy
+    headers = {"Cache-Control": "no-cache"}
+
+    # Ids are handed out before commit, so neither visit nor change ids say what a client has
+    # seen: the cursor is a transaction id watermark, and every change logged at or above it
+    # may still be new to the client
+    delta_cursor = _parse_visit_cursor(since)
+    cursor = delta_cursor or _parse_visit_cursor(request.headers.get("if-none-match"))
+    if cursor:
+        next_cursor = await _visit_cursor(db) if delta_cursor else None
+        changes = (await db.execute(
+            select(VisitChange.visit_id, VisitChange.action)
+            .where(*change_filters, VisitChange.txid >= cursor.watermark)
+        )).all()
+        if not changes:
+            # Nothing logged since: the old cursor is still exact, so the client's copy stays valid
+            return Response(status_code=304, headers={"ETag": f'"{cursor}"', "Cache-Control": "no-cache"})
+
+        if delta_cursor:
+            deleted = {c.visit_id for c in changes if c.action == "deleted"}
+            changed = {c.visit_id for c in changes} - deleted
+            rows = []
+            if changed:
+                rows = (await db.execute(
+                    query.where(V.id.in_(changed)).order_by(V.visit_date.desc(), V.id.desc())
+                )).all()
+            headers["ETag"] = f'"{next_cursor}"'
+            return ORJSONResponse({
+                "data": _group_visits_by_class(rows),
+                "deleted": sorted(deleted),
+                "total": len(rows),
+                "cursor": str(next_cursor),
+            }, headers=headers)
+
+    if limit:
+        limit = min(limit, MAX_PAGE_SIZE)
+        page = query.order_by(V.id.desc())
+        if after is not None:
+            page = page.where(V.id < after)
+        # The first page carries the delta cursor for the whole listing
+        next_cursor = await _visit_cursor(db) if after is None else None
+        rows = (await db.execute(page.limit(limit + 1))).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        body = {
+            "data": _group_visits_by_class(rows),
+            "total": len(rows),
+            "next_after": rows[-1].id if has_more else None,
+        }
+        if next_cursor:
+            body["cursor"] = str(next_cursor)
+            headers["ETag"] = f'"{next_cursor}"'
+        return ORJSONResponse(body, headers=headers)
 
-    result = {}
-    for r in rows:
-        cls = r.class_name
-        if cls not in result:
-            result[cls] = []
-        result[cls].append({
-            "student_name": r.student_name,
-            "date": r.visit_date.strftime("%Y-%m-%d"),
-            "timestamp": r.created_at.isoformat() if r.created_at else None,
-            "id": r.id,
-            "movement_method": r.movement_method,
-            "arrival_plate_number": r.arrival_plate_number,
-            "assigned_plate_number": r.assigned_plate_number,
-        })
+    next_cursor = await _visit_cursor(db)
+    rows = (await db.execute(query.order_by(V.visit_date.desc(), V.id.desc()))).all()
+    headers["ETag"] = f'"{next_cursor}"'
 
+    result = _group_visits_by_class(rows)
     stats = {cls: len(students) for cls, students in result.items()}
-    return {"data": result, "stats": stats, "total": len(rows)}
+    return ORJSONResponse({"data": result, "stats": stats, "total": len(rows), "cursor": str(next_cursor)}, headers=headers)
+
+
+def _parse_stats_date(visit_date: str | None):
+    """None (all dates) when absent; raises ValueError on a malformed date"""
+    if not visit_date:
+        return None
+    return datetime.strptime(visit_date, "%Y-%m-%d").date()
+
+
+@app.get("/{school_name}/admin/stats/{visit_type}")
+async def visit_stats(
+    school_name: str,
+    visit_type: str,
+    visit_date: str | None = Query(None),
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Per-class visit counts read from the visit_counts aggregate (all dates unless visit_date is given)"""
+    try:
+        target_date = _parse_stats_date(visit_date)
+    except ValueError:
+        return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}
+
+    stmt = select(
+        VisitCount.class_name,
+        func.sum(VisitCount.total).label("total"),
+        func.sum(VisitCount.with_car).label("with_car"),
+        func.sum(VisitCount.without_car).label("without_car"),
+    ).where(
+        _for_school(VisitCount, school.id),
+        VisitCount.visit_type == visit_type,
+    ).group_by(VisitCount.class_name).having(func.sum(VisitCount.total) > 0)
+    if target_date:
+        stmt = stmt.where(VisitCount.visit_date == target_date)
+    rows = (await db.execute(stmt)).all()
+
+    return {
+        "status": "success",
+        "stats": {r.class_name: int(r.total) for r in rows},
+        "total": sum(int(r.total) for r in rows),
+        "with_car": sum(int(r.with_car) for r in rows),
+        "without_car": sum(int(r.without_car) for r in rows),
+    }
+
+
+LIVE_FEED_KEEPALIVE = 15  # seconds between keep-alive comments on idle streams
+
+
+@app.get("/{school_name}/admin/live/{visit_type}")
+def live_visits(school_name: str, visit_type: str, school: SchoolInfo = Depends(get_school)):
+    """Server-Sent Events stream of visits recorded or deleted for a school.
+
+    Sends ``ready`` once subscribed (clients load the current snapshot then),
+    then ``visit_added`` / ``visit_updated`` / ``visit_deleted`` as they happen
+    in any worker, and ``resync`` if the client fell too far behind or events
+    may have been missed.
+    """
+    school_id = school.id
+
+    async def stream():
+        queue = visit_feed.subscribe(school_id, visit_type)
+        try:
+            yield "retry: 3000\n" + format_sse({"type": "ready"})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=LIVE_FEED_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            visit_feed.unsubscribe(school_id, visit_type, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
 
 
 @app.post("/{school_name}/admin/upload-students")
-def upload_students(school_name: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
+def upload_students(school_name: str, file: UploadFile = File(...), school: SchoolInfo = Depends(get_school), db: Session = Depends(get_db)):
     """Upload students for a specific school from Excel file"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
+    import pandas as pd
+
     try:
         df = pd.read_excel(file.file)
     except Exception:
@@ -365,62 +1089,177 @@ def upload_students(school_name: str, file: UploadFile = File(...), db: Session
     if not required_columns.issubset(df.columns):
         return JSONResponse({"error": "Invalid Excel format"}, status_code=400)
 
-    added = 0
-    skipped = 0
-    for _, row in df.iterrows():
-        name, cls = row["student_name"], row["class_name"]
-        if db.query(Student).filter(Student.student_name == name, Student.class_name == cls, Student.school_id == school.id).first():
-            skipped += 1
-            continue
-        db.add(Student(student_name=name, class_name=cls, school_id=school.id))
-        added += 1
-    db.commit()
-    return {"status": "success", "added": added, "skipped": skipped}
+    # Normalise the roster in the DataFrame; Excel row numbers are index + 2 (header is row 1)
+    roster = df[["student_name", "class_name"]].map(_excel_text, na_action="ignore")
+    roster.index = roster.index + 2
+
+    errors = []
+    missing = roster.isna().any(axis=1)
+    errors += [{"row": int(i), "message": "Missing student_name or class_name"} for i in roster.index[missing]]
+    roster = roster[~missing]
+
+    too_long = (roster["student_name"].str.len() > 100) | (roster["class_name"].str.len() > 50)
+    errors += [{"row": int(i), "message": "Student name or class name is too long"} for i in roster.index[too_long]]
+    roster = roster[~too_long]
+
+    # One query for the school's existing (name, class) pairs, then skip those and in-file repeats
+    existing = db.query(Student.student_name, Student.class_name).filter(_for_school(Student, school.id)).all()
+    skip = roster.duplicated(keep="first")
+    if existing and not roster.empty:
+        skip |= pd.MultiIndex.from_frame(roster).isin([tuple(e) for e in existing])
+    new_students = roster[~skip]
+
+    if not new_students.empty:
+        try:
+            student_ids = db.execute(insert(Student).returning(Student.id), [
+                {"student_name": name, "class_name": cls, "school_id": school.id}
+                for name, cls in new_students.itertuples(index=False)
+            ]).scalars().all()
+            _record_roster_changes(db, school.id, student_ids, "added")
+            db.commit()
+            cache_bus.publish("roster", school.id)
+        except Exception as e:
+            db.rollback()
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    errors.sort(key=lambda e: e["row"])
+    return {"status": "success", "added": len(new_students), "skipped": int(skip.sum()), "errors": errors}
 
 
 # Get all students for a specific school
-@app.get("/{school_name}/admin/students")
-def get_all_students(school_name: str, db: Session = Depends(get_db)):
-    school = _get_school(school_name, db)
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    students = db.query(Student.id, Student.student_name, Student.class_name).filter(
-        (Student.school_id == school["id"]) | (Student.school_id.is_(None))
-    ).all()
-    return {"status": "success", "students": [{"id": s.id, "student_name": s.student_name, "class_name": s.class_name} for s in students]}
+@app.get("/{school_name}/admin/students", response_class=ORJSONResponse)
+def get_all_students(
+    school_name: str,
+    limit: int | None = Query(None, ge=1),
+    after: int | None = Query(None),
+    class_name: str | None = Query(None),
+    school: SchoolInfo = Depends(get_school),
+    db: Session = Depends(get_read_db)
+):
+    """All students, or one page of them in id order when ``limit`` is given.
+
+    Pass the previous page's ``next_after`` as ``after`` to continue;
+    ``next_after`` is null on the last page.
+    """
+    query = db.query(Student.id, Student.student_name, Student.class_name).filter(
+        _for_school(Student, school.id)
+    )
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+
+    if not limit:
+        students = query.all()
+        return ORJSONResponse({"status": "success", "students": [{"id": s.id, "student_name": s.student_name, "class_name": s.class_name} for s in students]})
+
+    limit = min(limit, MAX_PAGE_SIZE)
+    if after is not None:
+        query = query.filter(Student.id > after)
+    students = query.order_by(Student.id).limit(limit + 1).all()
+    has_more = len(students) > limit
+    students = students[:limit]
+    return ORJSONResponse({
+        "status": "success",
+        "students": [{"id": s.id, "student_name": s.student_name, "class_name": s.class_name} for s in students],
+        "next_after": students[-1].id if has_more else None,
+    })
+
+
+@app.get("/{school_name}/students/sync")
+async def sync_students(
+    school_name: str,
+    since: int = Query(0, ge=0),
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Roster changes since a client's version, as compact [id, name, class] rows.
+
+    ``since=0`` (or a version this server doesn't know) returns the full
+    roster with ``full: true``; otherwise ``added`` rows and ``removed`` ids,
+    possibly repeating changes the client already applied.
+    """
+    # A transaction id watermark rather than the latest change id: ids are handed out
+    # before commit, so a later-committing change can sit below the newest one
+    version = await _snapshot_watermark(db)
+    tenant = _for_school(Student, school.id)
+
+    if since == 0 or since > version:
+        rows = (await db.execute(
+            select(Student.id, Student.student_name, Student.class_name).where(tenant).order_by(Student.id)
+        )).all()
+        return {"status": "success", "version": version, "full": True, "students": [list(r) for r in rows]}
+
+    changes = (await db.execute(
+        select(RosterChange.student_id, RosterChange.action).where(
+            _for_school(RosterChange, school.id),
+            RosterChange.txid >= since
+        )
+    )).all()
+    removed = {c.student_id for c in changes if c.action == "removed"}
+    added_ids = {c.student_id for c in changes if c.action == "added"} - removed
+    added = []
+    if added_ids:
+        added = (await db.execute(
+            select(Student.id, Student.student_name, Student.class_name).where(
+                tenant, Student.id.in_(added_ids)
+            ).order_by(Student.id)
+        )).all()
+    return {
+        "status": "success",
+        "version": version,
+        "full": False,
+        "added": [list(r) for r in added],
+        "removed": sorted(removed),
+    }
 
 
 # Delete a student by ID from a specific school
 @app.delete("/{school_name}/admin/students/{student_id}")
-def delete_student(school_name: str, student_id: int, db: Session = Depends(get_db)):
+def delete_student(school_name: str, student_id: int, school: SchoolInfo = Depends(get_school), db: Session = Depends(get_db)):
     """Delete a student from a specific school"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
-    student = db.query(Student).filter(Student.id == student_id).first()
+    student = db.query(Student).filter(Student.id == student_id, _for_school(Student, school.id)).first()
     if not student:
         return {"status": "error", "message": "Student not found"}
 
+    # Visits go with the student (cascade); log them for incremental clients
+    visits = db.query(VisitHistory.id, VisitHistory.visit_type, VisitHistory.visit_date, VisitHistory.movement_method).filter(
+        VisitHistory.student_id == student.id
+    ).all()
+    for visit in visits:
+        _record_visit_change(db, school.id, visit, "deleted")
+    for stmt in _visit_count_changes(school.id, [(student.class_name, visit) for visit in visits], sign=-1):
+        db.execute(stmt)
+    _record_roster_changes(db, school.id, [student.id], "removed")
+    db.query(VisitArchive).filter(VisitArchive.student_id == student.id).delete(synchronize_session=False)
     db.delete(student)
     db.commit()
+    cache_bus.publish("roster", school.id)
+    for visit in visits:
+        visit_feed.publish(school.id, visit.visit_type, {"type": "visit_deleted", "id": visit.id})
     return {"status": "success", "message": f"Student '{student.student_name}' deleted"}
 
 
 # Delete a visit by ID
 @app.delete("/{school_name}/admin/visits/{visit_id}")
-def delete_visit(school_name: str, visit_id: int, db: Session = Depends(get_db)):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    visit = db.query(Visit).join(Student).filter(
-        Visit.id == visit_id,
-        (Student.school_id == school.id) | (Student.school_id.is_(None))
-    ).first()
-    if not visit:
+def delete_visit(school_name: str, visit_id: int, school: SchoolInfo = Depends(get_school), db: Session = Depends(get_db)):
+    row = None
+    # Old visits may have been moved to visits_archive
+    for table in (Visit, VisitArchive):
+        row = db.query(table, Student.class_name).join(Student, Student.id == table.student_id).filter(
+            table.id == visit_id,
+            _for_school(Student, school.id)
+        ).first()
+        if row:
+            break
+    if not row:
         return {"status": "error", "message": "Visit not found"}
+    visit, class_name = row
+    deleted_id, deleted_type = visit.id, visit.visit_type
+    _record_visit_change(db, school.id, visit, "deleted")
+    for stmt in _visit_count_changes(school.id, [(class_name, visit)], sign=-1):
+        db.execute(stmt)
     db.delete(visit)
     db.commit()
+    visit_feed.publish(school.id, deleted_type, {"type": "visit_deleted", "id": deleted_id})
     return {"status": "success"}
 
 
@@ -430,18 +1269,15 @@ def add_student(
     school_name: str,
     student_name: str = Form(...),
     class_name: str = Form(...),
+    school: SchoolInfo = Depends(get_school),
     db: Session = Depends(get_db)
 ):
     """Add a single student to a specific school"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
     # Check if student already exists
     existing = db.query(Student).filter(
         Student.student_name == student_name,
         Student.class_name == class_name,
-        Student.school_id == school.id
+        _for_school(Student, school.id)
     ).first()
     if existing:
         return {"status": "error", "message": "Student already exists"}
@@ -449,26 +1285,23 @@ def add_student(
     # Add new student with school_id
     student = Student(student_name=student_name, class_name=class_name, school_id=school.id)
     db.add(student)
+    db.flush()
+    _record_roster_changes(db, school.id, [student.id], "added")
     db.commit()
+    cache_bus.publish("roster", school.id)
     return {"status": "success", "student_id": student.id, "message": "Student added successfully"}
 
 
-@app.get("/{school_name}/admin/car-management")
-def get_car_management_data(
+@app.get("/{school_name}/admin/car-management", response_class=ORJSONResponse)
+async def get_car_management_data(
     school_name: str,
     visit_type: str = Query(..., pattern="^(visit_day|parent_meeting)$"),
     visit_date: str | None = Query(None),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List SOS visits (default today) with car movement details for admin assignment."""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    is_sos_school = (
-        (school.school_code or "").strip().lower() == "sos"
-        or "sos" in (school.school_name or "").strip().lower()
-    )
-    if not is_sos_school:
+    if not _is_sos_school(school):
         return {"status": "error", "message": "Car management is available only for SOS school"}
 
     target_date = datetime.now().date()
@@ -478,20 +1311,27 @@ def get_car_management_data(
         except ValueError:
             return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}
 
-    visits = db.query(Visit).join(Student).filter(
-        Visit.visit_type == visit_type,
-        Visit.visit_date == target_date,
-        (Student.school_id == school.id) | (Student.school_id.is_(None))
-    ).order_by(Visit.id.asc()).all()
-
-    return {
+    # Column-only join: one statement however many visits, no Student objects to lazy-load
+    V = visit_source(target_date)
+    visits = (await db.execute(
+        select(
+            V.id, V.student_id, Student.student_name, Student.class_name, V.visit_type, V.visit_date,
+            V.movement_method, V.arrival_plate_number, V.assigned_plate_number
+        ).join(Student, Student.id == V.student_id).where(
+            V.visit_type == visit_type,
+            V.visit_date == target_date,
+            _for_school(Student, school.id)
+        ).order_by(V.id.asc())
+    )).all()
+
+    return ORJSONResponse({
         "status": "success",
         "records": [
             {
                 "visit_id": v.id,
-                "student_id": v.student.id,
-                "student_name": v.student.student_name,
-                "class_name": v.student.class_name,
+                "student_id": v.student_id,
+                "student_name": v.student_name,
+                "class_name": v.class_name,
                 "visit_type": v.visit_type,
                 "visit_date": v.visit_date.strftime("%Y-%m-%d"),
                 "movement_method": v.movement_method,
@@ -500,176 +1340,215 @@ def get_car_management_data(
             }
             for v in visits
         ],
-    }
+    })
 
 
 @app.post("/{school_name}/admin/car-management/assign")
-def assign_car_plate(
+async def assign_car_plate(
     school_name: str,
     visit_id: int = Form(...),
     assigned_plate_number: str = Form(...),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Assign a managed car plate to a specific student visit."""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    is_sos_school = (
-        (school.school_code or "").strip().lower() == "sos"
-        or "sos" in (school.school_name or "").strip().lower()
-    )
-    if not is_sos_school:
+    if not _is_sos_school(school):
         return {"status": "error", "message": "Car management is available only for SOS school"}
 
-    visit = db.query(Visit).join(Student).filter(
-        Visit.id == visit_id,
-        (Student.school_id == school.id) | (Student.school_id.is_(None))
-    ).first()
-    if not visit:
+    # Car management lists archived visits too (visit_source); ids are unique across both tables.
+    # The row lock keeps the archiver from moving the visit before the update lands.
+    row = None
+    for V in (Visit, VisitArchive):
+        row = (await db.execute(
+            select(V, Student.student_name, Student.class_name).join(Student, Student.id == V.student_id).where(
+                V.id == visit_id,
+                _for_school(Student, school.id)
+            ).with_for_update(of=V)
+        )).first()
+        if row:
+            break
+    if not row:
         return {"status": "error", "message": "Visit record not found"}
+    visit = row[0]
 
     plate = assigned_plate_number.strip().upper()
     if not plate:
         return {"status": "error", "message": "Assigned plate number is required"}
 
     visit.assigned_plate_number = plate
-    db.commit()
+    _record_visit_change(db, school.id, visit, "updated")
+    await db.commit()
+    visit_feed.publish(school.id, visit.visit_type, {
+        "type": "visit_updated",
+        "visit": _visit_row(visit, row.student_name, row.class_name),
+    })
     return {"status": "success", "message": "Car plate assigned successfully", "visit_id": visit.id}
 
 
 # ==================== PRODUCT ENDPOINTS ====================
 
-@app.get("/{school_name}/products")
-def get_products(school_name: str, db: Session = Depends(get_db)):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    products = db.query(Product).filter(
-        (Product.school_id == school.id) | (Product.school_id.is_(None))
-    ).all()
-    return {"status": "success", "products": [{"product_id": p.product_id, "product_name": p.product_name, "product_price": p.product_price} for p in products]}
+@app.get("/{school_name}/products", response_class=ORJSONResponse)
+async def get_products(school_name: str, school: SchoolInfo = Depends(get_school), db: AsyncSession = Depends(get_async_read_db)):
+    # The cache holds the serialized response body, so hits skip serialization entirely
+    body = _products_cache.get(school.id)
+    if body is None:
+        rows = (await db.execute(
+            select(Product.product_id, Product.product_name, Product.product_price).where(
+                _for_school(Product, school.id)
+            )
+        )).all()
+        products = [{"product_id": p.product_id, "product_name": p.product_name, "product_price": p.product_price} for p in rows]
+        body = orjson.dumps({"status": "success", "products": products})
+        _products_cache.set(school.id, body)
+    return Response(body, media_type="application/json")
 
 
 @app.post("/{school_name}/admin/products/add")
-def add_product(
+async def add_product(
     school_name: str,
     product_name: str = Form(...),
     product_price: int = Form(...),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
     product = Product(product_name=product_name, product_price=product_price, school_id=school.id)
     db.add(product)
-    db.commit()
+    await db.commit()
+    # Queued behind the request's read-your-writes mark, so no worker refills it from a lagging replica
+    cache_bus.broadcast("products", school.id)
     return {"status": "success", "product_id": product.product_id}
 
 
 @app.put("/{school_name}/admin/products/{product_id}")
-def update_product(
+async def update_product(
     school_name: str,
     product_id: int,
     product_name: str = Form(...),
     product_price: int = Form(...),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    product = db.query(Product).filter(Product.product_id == product_id, Product.school_id == school.id).first()
+    product = (await db.execute(
+        select(Product).where(Product.product_id == product_id, _for_school(Product, school.id))
+    )).scalars().first()
     if not product:
         return {"status": "error", "message": "Product not found"}
     product.product_name = product_name
     product.product_price = product_price
-    db.commit()
+    await db.commit()
+    cache_bus.broadcast("products", school.id)
     return {"status": "success"}
 
 
 @app.delete("/{school_name}/admin/products/{product_id}")
-def delete_product(
+async def delete_product(
     school_name: str,
     product_id: int,
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    product = db.query(Product).filter(Product.product_id == product_id, Product.school_id == school.id).first()
+    product = (await db.execute(
+        select(Product).where(Product.product_id == product_id, _for_school(Product, school.id))
+    )).scalars().first()
     if not product:
         return {"status": "error", "message": "Product not found"}
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
+    cache_bus.broadcast("products", school.id)
     return {"status": "success"}
 
 
 # ==================== EXPORT ENDPOINTS ====================
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_WIDTH_SAMPLE = 200  # rows used to size columns
+EXPORT_YIELD_PER = 1000  # rows fetched from the DB per round trip
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _xlsx_response(filename: str, sheet_title: str, headers: list, rows, header_color: str):
+    """Write rows through a write-only workbook and send the .xlsx back in chunks.
+
+    Column widths come from the header and the first EXPORT_WIDTH_SAMPLE
+    rows; the rest are written without being held in memory. openpyxl only
+    writes the zip on save, so the file is complete (in a spooled temp file)
+    before the first byte goes out.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_title)
+
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, EXPORT_WIDTH_SAMPLE))
+    for idx, header in enumerate(headers):
+        max_length = max([len(header)] + [len(str(row[idx])) for row in sample if row[idx] is not None])
+        worksheet.column_dimensions[get_column_letter(idx + 1)].width = min(max_length + 2, 50)
+
+    # Style header row
+    header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        header_cells.append(cell)
+    worksheet.append(header_cells)
+
+    for row in itertools.chain(sample, rows):
+        worksheet.append(row)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(buffer)
+    buffer.seek(0)
+
+    def stream():
+        try:
+            while chunk := buffer.read(EXPORT_CHUNK_SIZE):
+                yield chunk
+        finally:
+            buffer.close()
+
+    return StreamingResponse(stream(), media_type=XLSX_MEDIA_TYPE, headers={
+        "Content-Disposition": _attachment_disposition(filename)
+    })
+
+
+def _attachment_disposition(filename: str) -> str:
+    """Content-Disposition as FileResponse builds it: RFC 5987 encoded unless the name is plain ASCII"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
 @app.get("/{school_name}/export/students")
 def export_students_to_excel(
     school_name: str,
     class_name: str | None = Query(None),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: Session = Depends(get_read_db)
 ):
     """Export all students for a specific school to Excel file"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
     try:
-        query = db.query(Student).filter(
-            (Student.school_id == school.id) | (Student.school_id.is_(None))
+        query = db.query(Student.student_name, Student.class_name, Student.id).filter(
+            _for_school(Student, school.id)
         )
         class_filter = (class_name or "").strip()
         if class_filter and class_filter.lower() != "all":
             query = query.filter(Student.class_name == class_filter)
-        students = query.all()
-        
-        # Prepare data for Excel
-        data = []
-        for student in students:
-            data.append({
-                "Student Name": student.student_name,
-                "Class": student.class_name,
-                "ID": student.id
-            })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        # Generate filename with timestamp
+
         filename = f"students_{school_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = f"/tmp/{filename}"
-        
-        # Write to Excel with formatting
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Students', index=False)
-            
-            # Access the workbook and worksheet for formatting
-            workbook = writer.book
-            worksheet = writer.sheets['Students']
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Style header row
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-        
-        return FileResponse(filepath, filename=filename, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        return _xlsx_response(
+            filename, "Students",
+            ["Student Name", "Class", "ID"],
+            (tuple(row) for row in query.yield_per(EXPORT_YIELD_PER)),
+            "4472C4",
+        )
     
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -680,77 +1559,52 @@ def export_visits_to_excel(
     school_name: str, 
     visit_type: str = Query(..., pattern="^(visit_day|parent_meeting)$"),
     visit_date: str | None = Query(None),
-    db: Session = Depends(get_db)
+    school: SchoolInfo = Depends(get_school),
+    db: Session = Depends(get_read_db)
 ):
     """Export visit data for a specific school and visit type to Excel file"""
-    school = db.query(School).filter(School.school_name == school_name).first()
-    if not school:
-        raise HTTPException(status_code=404, detail="School not found")
-    
     try:
-        query = db.query(Visit).join(Student).filter(
-            Visit.visit_type == visit_type,
-            (Student.school_id == school.id) | (Student.school_id.is_(None))
-        )
+        target = None
         if visit_date:
             try:
                 target = datetime.strptime(visit_date, "%Y-%m-%d").date()
-                query = query.filter(Visit.visit_date == target)
             except ValueError:
                 pass
-        visits = query.all()
-        
-        # Prepare data for Excel
-        data = []
-        for visit in visits:
-            data.append({
-                "Student Name": visit.student.student_name,
-                "Class": visit.student.class_name,
-                "Visit Type": visit.visit_type.replace('_', ' ').title(),
-                "Visit Date": visit.visit_date.strftime("%Y-%m-%d"),
-                "Status": visit.status,
-                "Movement Method": visit.movement_method if visit.movement_method else "-",
-                "Arrival Plate": visit.arrival_plate_number if visit.arrival_plate_number else "-",
-                "Assigned Plate": visit.assigned_plate_number if visit.assigned_plate_number else "-",
-            })
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        # Generate filename with timestamp
+
+        V = visit_source(target)
+        query = db.query(
+            Student.student_name, Student.class_name, V.visit_date, V.status,
+            V.movement_method, V.arrival_plate_number, V.assigned_plate_number
+        ).join(Student, Student.id == V.student_id).filter(
+            V.visit_type == visit_type,
+            _for_school(Student, school.id)
+        )
+        if target:
+            query = query.filter(V.visit_date == target)
+
+        visit_type_title = visit_type.replace('_', ' ').title()
+        rows = (
+            (
+                v.student_name,
+                v.class_name,
+                visit_type_title,
+                v.visit_date.strftime("%Y-%m-%d"),
+                v.status,
+                v.movement_method if v.movement_method else "-",
+                v.arrival_plate_number if v.arrival_plate_number else "-",
+                v.assigned_plate_number if v.assigned_plate_number else "-",
+            )
+            for v in query.yield_per(EXPORT_YIELD_PER)
+        )
+
         visit_type_label = "visit_day" if visit_type == "visit_day" else "parent_meeting"
         filename = f"{visit_type_label}_{school_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        filepath = f"/tmp/{filename}"
-        
-        # Write to Excel with formatting
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Visit Data', index=False)
-            
-            # Access the workbook and worksheet for formatting
-            workbook = writer.book
-            worksheet = writer.sheets['Visit Data']
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Style header row
-            header_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-        
-        return FileResponse(filepath, filename=filename, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        return _xlsx_response(
+            filename, "Visit Data",
+            ["Student Name", "Class", "Visit Type", "Visit Date", "Status", "Movement Method", "Arrival Plate", "Assigned Plate"],
+            rows,
+            "70AD47",
+        )
     
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -758,10 +1612,11 @@ def export_visits_to_excel(
 
 import threading
 import time
-import requests
 import os
 
 def keep_awake():
+    import requests
+
     url = os.environ.get("RENDER_URL", "https://myschool-rw-web.onrender.com")  # set your deployed URL in env variables
     while True:
         try:
@@ -771,4 +1626,10 @@ def keep_awake():
         time.sleep(10 * 60)  # ping every 10 minutes
 
 threading.Thread(target=keep_awake, daemon=True).start()
+
+# Move visits older than VISIT_ARCHIVE_AFTER_DAYS into visits_archive once a day
+start_archiver()
   
+
+startup_timing.mark("routes and background tasks")
+startup_timing.report()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Visit Archive Module
+Moves visits older than VISIT_ARCHIVE_AFTER_DAYS out of the hot visits table
+into visits_archive, so the day-to-day queries only scan the current term,
+and drops visit_changes entries older than VISIT_CHANGE_RETENTION_DAYS.
+
+The app runs the job in a background thread every VISIT_ARCHIVE_INTERVAL_HOURS;
+it can also be run out-of-band (e.g. from cron):
+
+    python archive.py
+
+Readers that may need historic rows pick their source with visit_source().
+"""
+from datetime import date, datetime, timedelta
+import os
+import threading
+import time
+
+from sqlalchemy import delete, text
+
+from config import engine
+from model import Visit, VisitHistory, VisitChange
+
+# 0 disables the job; visits already archived stay readable
+VISIT_ARCHIVE_AFTER_DAYS = int(os.getenv("VISIT_ARCHIVE_AFTER_DAYS", "120"))
+VISIT_ARCHIVE_INTERVAL_HOURS = float(os.getenv("VISIT_ARCHIVE_INTERVAL_HOURS", "24"))
+VISIT_ARCHIVE_BATCH = 5000  # rows moved per transaction
+# admin_data cursors older than this get a full response instead of a delta
+VISIT_CHANGE_RETENTION_DAYS = int(os.getenv("VISIT_CHANGE_RETENTION_DAYS", "7"))
+
+# Arbitrary pg_advisory_lock key so only one worker archives at a time
+ARCHIVE_LOCK_KEY = 720914
+
+_VISIT_COLUMNS = ", ".join(c.name for c in Visit.__table__.c)
+
+
+def archive_cutoff() -> date:
+    """Visits dated before this day may be in visits_archive"""
+    return date.today() - timedelta(days=max(VISIT_ARCHIVE_AFTER_DAYS, 0))
+
+
+def visit_source(target_date: date | None):
+    """Visit when every row for ``target_date`` is still in the hot table, VisitHistory otherwise"""
+    if target_date is not None and target_date >= archive_cutoff():
+        return Visit
+    return VisitHistory
+
+
+def archive_visits() -> int:
+    """Move visits older than the cutoff into visits_archive; returns the number moved"""
+    if VISIT_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+
+    moved = 0
+    with engine.connect() as connection:
+        if not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}).scalar():
+            connection.rollback()
+            return 0
+        try:
+            while True:
+                batch = connection.execute(text(f"""
+                    WITH moved AS (
+                        DELETE FROM visits WHERE id IN (
+                            SELECT id FROM visits WHERE visit_date < :cutoff ORDER BY id LIMIT :batch
+                        )
+                        RETURNING {_VISIT_COLUMNS}
+                    )
+                    INSERT INTO visits_archive ({_VISIT_COLUMNS}) SELECT {_VISIT_COLUMNS} FROM moved
+                """), {"cutoff": archive_cutoff(), "batch": VISIT_ARCHIVE_BATCH}).rowcount
+                connection.commit()
+                moved += batch
+                if batch < VISIT_ARCHIVE_BATCH:
+                    break
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_KEY})
+            connection.commit()
+    return moved
+
+
+def prune_visit_changes() -> int:
+    """Delete visit_changes entries older than the retention window; returns the number deleted"""
+    cutoff = datetime.utcnow() - timedelta(days=VISIT_CHANGE_RETENTION_DAYS)
+    with engine.begin() as connection:
+        return connection.execute(delete(VisitChange).where(VisitChange.created_at < cutoff)).rowcount
+
+
+def _archive_loop():
+    while True:
+        try:
+            moved = archive_visits()
+            if moved:
+                print(f"✓ Archived {moved} visits older than {archive_cutoff()}")
+        except Exception as e:
+            print(f"Warning: Visit archival failed: {e}")
+        try:
+            pruned = prune_visit_changes()
+            if pruned:
+                print(f"✓ Pruned {pruned} visit changes older than {VISIT_CHANGE_RETENTION_DAYS} days")
+        except Exception as e:
+            print(f"Warning: Visit change pruning failed: {e}")
+        time.sleep(VISIT_ARCHIVE_INTERVAL_HOURS * 3600)
+
+
+def start_archiver():
+    """Run archive_visits and prune_visit_changes periodically in a daemon thread"""
+    threading.Thread(target=_archive_loop, daemon=True).start()
+
+
+if __name__ == "__main__":
+    from migrations import ensure_schema
+
+    ensure_schema()
+    moved = archive_visits()
+    print(f"✓ Archived {moved} visits older than {archive_cutoff()}")
+    pruned = prune_visit_changes()
+    print(f"✓ Pruned {pruned} visit changes older than {VISIT_CHANGE_RETENTION_DAYS} days")
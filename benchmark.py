@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Benchmark Script
+Seeds a disposable Postgres database with synthetic schools, students and
+visits, drives the app in-process with visit-day traffic and reports
+throughput and p50/p95/p99 latency per route.
+
+    export BENCH_DATABASE_URL='postgresql://postgres:@/myschool_bench?host=/tmp/pgdata'
+    python benchmark.py                      # seed if needed, run, compare to baseline
+    python benchmark.py --students 100000 --reseed
+    python benchmark.py --mix end_of_day --duration 60
+    python benchmark.py --save-baseline      # rewrite benchmark_baseline.json
+    python benchmark.py --serialization      # JSON encoding cost per 1k rows, no database
+
+Visits recorded during a run stay in the database; pass --reseed before
+runs that are compared against each other. BENCH_DATABASE_URL is required and must point at a local database: the
+benchmark writes tens of thousands of rows. A unix-socket URL is the
+easiest way to satisfy the engines' sslmode=require locally. Needs httpx
+(pip install httpx), which also backs FastAPI's TestClient.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+BENCH_PREFIX = "bench_"
+
+FIRST_NAMES = [
+    "Aline", "Eric", "Diane", "Jean", "Claudine", "Patrick", "Grace", "Emmanuel", "Josiane", "Olivier",
+    "Chantal", "Innocent", "Sandrine", "Fabrice", "Alice", "David", "Esther", "Samuel", "Divine", "Kevin",
+    "Belise", "Yves", "Nadine", "Christian", "Ange", "Pacifique", "Joyeuse", "Thierry", "Clarisse", "Moise",
+]
+LAST_NAMES = [
+    "Uwimana", "Niyonzima", "Mukamana", "Habimana", "Ingabire", "Nshimiyimana", "Uwase", "Hakizimana",
+    "Mutoni", "Ndayisaba", "Umutoni", "Bizimana", "Iradukunda", "Tuyishime", "Nsengiyumva", "Mugisha",
+    "Irakoze", "Kamanzi", "Uwera", "Gasana", "Ishimwe", "Manzi", "Ntwari", "Keza",
+]
+CLASSES = [f"{level}{grade}{stream}" for level in ("P", "S") for grade in range(1, 7) for stream in "ABC"]
+
+# Weighted operation mixes; each operation may issue several requests
+MIXES = {
+    # Gates open: parents searching and checking in, admins watching the live table
+    "visit_day": {
+        "visit_type": "visit_day",
+        "weights": {
+            "search": 45, "add_visit": 20, "add_batch": 2, "admin_poll": 20, "admin_data": 3,
+            "admin_stats": 4, "car_management": 3, "roster_sync": 1, "export_visits": 1, "export_students": 1,
+        },
+    },
+    "parent_meeting": {
+        "visit_type": "parent_meeting",
+        "weights": {
+            "search": 40, "add_visit": 25, "add_batch": 2, "admin_poll": 25, "admin_data": 3,
+            "admin_stats": 3, "roster_sync": 1, "export_visits": 1,
+        },
+    },
+    # After the gates close: reports and exports
+    "end_of_day": {
+        "visit_type": "visit_day",
+        "weights": {
+            "search": 10, "admin_poll": 20, "admin_data": 20, "admin_stats": 20,
+            "car_management": 10, "export_visits": 10, "export_students": 10,
+        },
+    },
+}
+
+
+def _check_database_url(url: str, allow_remote: bool):
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    host = parsed.host or parsed.query.get("host") or ""
+    local = host in ("", "localhost", "127.0.0.1", "::1") or host.startswith("/")
+    if not local and not allow_remote:
+        sys.exit(f"Refusing to seed non-local database host '{host}' (pass --allow-remote to override)")
+
+
+# ==================== SEEDING ====================
+
+def _plate(rng: random.Random) -> str:
+    letters = "ABCDEFGHJKLMNPRSTUVWXYZ"
+    return f"RA{rng.choice(letters)} {rng.randint(100, 999)}{rng.choice(letters)}"
+
+
+def _visit_row(rng: random.Random, student_id: int, visit_type: str, visit_date: date, sos: bool) -> dict:
+    with_car = sos and rng.random() < 0.4
+    return {
+        "student_id": student_id,
+        "visit_type": visit_type,
+        "visit_date": visit_date,
+        "status": "done",
+        "movement_method": ("with_car" if with_car else "without_car") if sos else None,
+        "arrival_plate_number": _plate(rng) if with_car else None,
+        "created_at": datetime.combine(visit_date, datetime.min.time()) + timedelta(minutes=rng.randint(420, 1020)),
+    }
+
+
+def reset(engine):
+    """Delete every benchmark school and its rows"""
+    from sqlalchemy import text
+
+    with engine.begin() as connection:
+        school_ids = connection.execute(
+            text("SELECT id FROM schools WHERE school_name LIKE :prefix"), {"prefix": f"{BENCH_PREFIX}%"}
+        ).scalars().all()
+        if not school_ids:
+            return
+        params = {"ids": school_ids}
+        for statement in (
+            "DELETE FROM visits WHERE student_id IN (SELECT id FROM students WHERE school_id = ANY(:ids))",
+            "DELETE FROM visits_archive WHERE student_id IN (SELECT id FROM students WHERE school_id = ANY(:ids))",
+            "DELETE FROM visit_counts WHERE school_id = ANY(:ids)",
+            "DELETE FROM visit_changes WHERE school_id = ANY(:ids)",
+            "DELETE FROM roster_changes WHERE school_id = ANY(:ids)",
+            "DELETE FROM students WHERE school_id = ANY(:ids)",
+            "DELETE FROM products WHERE school_id = ANY(:ids)",
+            "DELETE FROM schools WHERE id = ANY(:ids)",
+        ):
+            connection.execute(text(statement), params)
+    print(f"✓ Removed {len(school_ids)} benchmark schools")
+
+
+def seed(engine, schools: int, students: int, history_days: int, visit_rate: float, seed_value: int):
+    """Create ``schools`` schools sharing ``students`` students, with visit history and today's visits.
+
+    The first school is an SOS school, so car-management and the movement
+    method rules are exercised too.
+    """
+    from sqlalchemy import insert, text
+    from model import Student, Visit
+    from system_admin import School
+
+    rng = random.Random(seed_value)
+    today = date.today()
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for n in range(1, schools + 1):
+            name = f"{BENCH_PREFIX}sos" if n == 1 else f"{BENCH_PREFIX}school_{n}"
+            school_id = connection.execute(
+                insert(School).returning(School.id),
+                {"school_name": name, "school_code": "sos" if n == 1 else f"BENCH{n}", "created_at": datetime.utcnow()}
+            ).scalar()
+
+            count = students // schools + (1 if n <= students % schools else 0)
+            roster = [
+                {
+                    "student_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "class_name": rng.choice(CLASSES),
+                    "school_id": school_id,
+                }
+                for _ in range(count)
+            ]
+            student_ids = connection.execute(insert(Student).returning(Student.id), roster).scalars().all()
+
+            visits = []
+            for days_ago in range(history_days, -1, -1):
+                visit_date = today - timedelta(days=days_ago)
+                visit_type = "parent_meeting" if days_ago % 7 == 3 else "visit_day"
+                # Today starts part-way through the visit day
+                rate = visit_rate * 0.5 if days_ago == 0 else visit_rate
+                for student_id in student_ids:
+                    if rng.random() < rate:
+                        visits.append(_visit_row(rng, student_id, visit_type, visit_date, n == 1))
+            for i in range(0, len(visits), 10000):
+                connection.execute(insert(Visit), visits[i:i + 10000])
+            print(f"  {name}: {count} students, {len(visits)} visits")
+
+        # Rebuild the aggregate counters the app keeps in step with visits
+        connection.execute(text("""
+            INSERT INTO visit_counts (school_id, class_name, visit_type, visit_date, total, with_car, without_car)
+            SELECT s.school_id, s.class_name, v.visit_type, v.visit_date,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE v.movement_method = 'with_car'),
+                   COUNT(*) FILTER (WHERE v.movement_method = 'without_car')
+            FROM visits v JOIN students s ON s.id = v.student_id
+            JOIN schools sc ON sc.id = s.school_id
+            WHERE sc.school_name LIKE :prefix
+            GROUP BY s.school_id, s.class_name, v.visit_type, v.visit_date
+        """), {"prefix": f"{BENCH_PREFIX}%"})
+        connection.execute(text("ANALYZE"))
+    print(f"✓ Seeded {schools} schools, {students} students in {time.perf_counter() - started:.1f}s")
+
+
+def load_fixture(engine) -> list:
+    """Benchmark schools with their (id, name) rosters"""
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        schools = connection.execute(text(
+            "SELECT id, school_name FROM schools WHERE school_name LIKE :prefix ORDER BY id"
+        ), {"prefix": f"{BENCH_PREFIX}%"}).all()
+        fixture = []
+        for school_id, school_name in schools:
+            roster = connection.execute(
+                text("SELECT id, student_name FROM students WHERE school_id = :id"), {"id": school_id}
+            ).all()
+            fixture.append({"id": school_id, "name": school_name, "sos": "sos" in school_name, "roster": roster})
+        return fixture
+
+
+# ==================== TRAFFIC ====================
+
+class Recorder:
+    """Latency samples and error counts per route"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.enabled = True
+
+    async def request(self, client, route: str, method: str, url: str, ok=(200, 304), **kwargs):
+        started = time.perf_counter()
+        # Not streamed, so the timing includes reading the whole body (exports included)
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if self.enabled:
+            self.samples.setdefault(route, []).append(elapsed)
+            if response.status_code not in ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+
+class Worker:
+    """One simulated client: a parent phone or an admin browser, picked per operation"""
+
+    def __init__(self, client, recorder: Recorder, fixture: list, mix: dict, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.fixture = fixture
+        self.visit_type = mix["visit_type"]
+        self.operations = list(mix["weights"])
+        self.weights = list(mix["weights"].values())
+        self.rng = rng
+        self.etags = {}
+        self.roster_versions = {}
+
+    def _visit_form(self, school: dict, student_id: int) -> dict:
+        form = {"student_id": student_id, "visit_type": self.visit_type}
+        if school["sos"]:
+            with_car = self.rng.random() < 0.4
+            form["movement_method"] = "with_car" if with_car else "without_car"
+            if with_car:
+                form["plate_number"] = _plate(self.rng)
+        return form
+
+    async def run_once(self):
+        school = self.rng.choice(self.fixture)
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        await getattr(self, operation)(school)
+
+    async def search(self, school):
+        # One request per keystroke, as the parent portal autocomplete does
+        name = self.rng.choice(school["roster"]).student_name
+        for length in range(2, min(len(name), 6) + 1):
+            await self.recorder.request(
+                self.client, "search", "GET", f"/{school['name']}/students/search", params={"q": name[:length]}
+            )
+
+    async def add_visit(self, school):
+        student = self.rng.choice(school["roster"])
+        await self.recorder.request(
+            self.client, "add_visit", "POST", f"/{school['name']}/visits/add", data=self._visit_form(school, student.id)
+        )
+
+    async def add_batch(self, school):
+        # An offline check-in device flushing its queue
+        students = self.rng.sample(school["roster"], min(25, len(school["roster"])))
+        visits = [dict(self._visit_form(school, s.id), key=str(s.id)) for s in students]
+        await self.recorder.request(
+            self.client, "add_batch", "POST", f"/{school['name']}/visits/add-batch", json={"visits": visits}
+        )
+
+    async def admin_poll(self, school):
+        # Live table refresh: today's visits, conditional on the last cursor
+        key = school["name"]
+        headers = {"If-None-Match": self.etags[key]} if key in self.etags else {}
+        response = await self.recorder.request(
+            self.client, "admin_poll", "GET", f"/{key}/admin/data/{self.visit_type}",
+            params={"visit_date": date.today().isoformat()}, headers=headers
+        )
+        if response.headers.get("etag"):
+            self.etags[key] = response.headers["etag"]
+
+    async def admin_data(self, school):
+        # Full admin table load (all dates)
+        await self.recorder.request(self.client, "admin_data", "GET", f"/{school['name']}/admin/data/{self.visit_type}")
+
+    async def admin_stats(self, school):
+        await self.recorder.request(self.client, "admin_stats", "GET", f"/{school['name']}/admin/stats/{self.visit_type}")
+
+    async def car_management(self, school):
+        if not school["sos"]:
+            school = self.fixture[0]
+        await self.recorder.request(
+            self.client, "car_management", "GET", f"/{school['name']}/admin/car-management",
+            params={"visit_type": self.visit_type}
+        )
+
+    async def roster_sync(self, school):
+        key = school["name"]
+        response = await self.recorder.request(
+            self.client, "roster_sync", "GET", f"/{key}/students/sync", params={"since": self.roster_versions.get(key, 0)}
+        )
+        if response.status_code == 200:
+            self.roster_versions[key] = response.json().get("version", 0)
+
+    async def export_visits(self, school):
+        await self.recorder.request(
+            self.client, "export_visits", "GET", f"/{school['name']}/export/visits",
+            params={"visit_type": self.visit_type, "visit_date": date.today().isoformat()}
+        )
+
+    async def export_students(self, school):
+        await self.recorder.request(self.client, "export_students", "GET", f"/{school['name']}/export/students")
+
+
+def _percentile(sorted_samples: list, pct: float) -> float:
+    index = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def summarize(recorder: Recorder, duration: float) -> dict:
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        samples = sorted(samples)
+        routes[route] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(route, 0),
+            "rps": round(len(samples) / duration, 1),
+            "p50_ms": round(_percentile(samples, 50) * 1000, 1),
+            "p95_ms": round(_percentile(samples, 95) * 1000, 1),
+            "p99_ms": round(_percentile(samples, 99) * 1000, 1),
+        }
+    return routes
+
+
+async def drive(fixture: list, mix: dict, duration: float, warmup: float, concurrency: int, seed_value: int) -> dict:
+    import httpx
+    import app
+
+    # Let the per-school search indexes finish building before measuring
+    if app.STUDENT_SEARCH_BACKEND == "memory":
+        deadline = time.monotonic() + 60
+        while any(app.student_search.get(s["id"]) is None for s in fixture) and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        workers = [Worker(client, recorder, fixture, mix, random.Random(seed_value + i)) for i in range(concurrency)]
+
+        async def loop(worker, until):
+            while time.monotonic() < until:
+                await worker.run_once()
+
+        recorder.enabled = False
+        until = time.monotonic() + warmup
+        await asyncio.gather(*(loop(w, until) for w in workers))
+
+        recorder.enabled = True
+        started = time.monotonic()
+        await asyncio.gather(*(loop(w, started + duration) for w in workers))
+        elapsed = time.monotonic() - started
+
+    return summarize(recorder, elapsed)
+
+
+# ==================== SERIALIZATION ====================
+
+def _serialization_payloads(rows: int, rng: random.Random) -> dict:
+    """Response bodies shaped like the hot list endpoints, ``rows`` records each"""
+    today = date.today()
+    names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rows)]
+    students = [{"id": i + 1, "student_name": n, "class_name": rng.choice(CLASSES)} for i, n in enumerate(names)]
+    visits = {}
+    for i, s in enumerate(students):
+        visits.setdefault(s["class_name"], []).append({
+            "student_name": s["student_name"],
+            "date": today.strftime("%Y-%m-%d"),
+            "timestamp": datetime.combine(today, datetime.min.time()).replace(hour=8, minute=i % 60).isoformat(),
+            "id": i + 1,
+            "movement_method": "with_car" if i % 3 == 0 else "without_car",
+            "arrival_plate_number": _plate(rng) if i % 3 == 0 else None,
+            "assigned_plate_number": None,
+        })
+    records = [{
+        "visit_id": i + 1, "student_id": s["id"], "student_name": s["student_name"], "class_name": s["class_name"],
+        "visit_type": "visit_day", "visit_date": today.strftime("%Y-%m-%d"),
+        "movement_method": "with_car", "arrival_plate_number": _plate(rng), "assigned_plate_number": None,
+    } for i, s in enumerate(students)]
+    products = [{"product_id": i + 1, "product_name": f"Item {i + 1}", "product_price": rng.randint(100, 20000)}
+                for i in range(rows)]
+    return {
+        "search": students,
+        "students": {"status": "success", "students": students},
+        "admin_data": {"data": visits, "stats": {c: len(v) for c, v in visits.items()}, "total": rows, "cursor": f"{rows}.0"},
+        "car_management": {"status": "success", "records": records},
+        "products": {"status": "success", "products": products},
+    }
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+
+def serialization(rows: int, repeat: int, seed_value: int):
+    """Print the cost of turning each endpoint's body into bytes: FastAPI's default path vs orjson"""
+    from typing import Dict, List
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import TypeAdapter
+
+    # search used to declare response_model=List[Dict]: validated and dumped by pydantic, then json.dumps
+    search_model = TypeAdapter(List[Dict])
+
+    def default_path(route, body):
+        if route == "search":
+            return lambda: JSONResponse(search_model.dump_python(search_model.validate_python(body), mode="json")).body
+        return lambda: JSONResponse(jsonable_encoder(body)).body
+
+    scale = 1000 / rows
+    print(f"Serialization per 1k rows ({rows} rows per body, best of 5 x {repeat} calls)\n")
+    print(f"{'route':<16} {'default ms':>11} {'orjson ms':>10} {'speedup':>8}")
+    for route, body in _serialization_payloads(rows, random.Random(seed_value)).items():
+        assert json.loads(default_path(route, body)()) == json.loads(ORJSONResponse(body).body)
+        before = _time_per_call(default_path(route, body), repeat) * scale * 1000
+        after = _time_per_call(lambda: ORJSONResponse(body).body, repeat) * scale * 1000
+        print(f"{route:<16} {before:>11.3f} {after:>10.3f} {before / after:>7.1f}x")
+    print("\nproducts cache hits reuse the stored bytes and skip serialization altogether")
+
+
+# ==================== REPORTING ====================
+
+def _delta(current: float, baseline: float) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+
+def report(routes: dict, baseline: dict | None, threshold: float) -> list:
+    """Print the per-route table; returns the routes whose p95 regressed past ``threshold`` percent"""
+    regressions = []
+    print(f"\n{'route':<16} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  vs baseline (p50/p95/p99)")
+    for route, r in routes.items():
+        line = f"{route:<16} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}"
+        base = (baseline or {}).get(route)
+        if base:
+            line += "  " + " / ".join(_delta(r[k], base[k]) for k in ("p50_ms", "p95_ms", "p99_ms"))
+            if base["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + threshold / 100):
+                regressions.append(route)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a local database and benchmark the app in-process")
+    parser.add_argument("--schools", type=int, default=3)
+    parser.add_argument("--students", type=int, default=10000, help="total students across all schools")
+    parser.add_argument("--history-days", type=int, default=14, help="days of past visits to seed")
+    parser.add_argument("--visit-rate", type=float, default=0.6, help="share of students visiting per day")
+    parser.add_argument("--reseed", action="store_true", help="drop and recreate the benchmark schools")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="visit_day")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=20, help="simulated clients")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run's results as the baseline")
+    parser.add_argument("--threshold", type=float, default=25, help="p95 slowdown (%%) reported as a regression")
+    parser.add_argument("--allow-remote", action="store_true")
+    parser.add_argument("--serialization", action="store_true",
+                        help="only time JSON serialization of the hot list responses (no database needed)")
+    parser.add_argument("--rows", type=int, default=1000, help="records per body for --serialization")
+    args = parser.parse_args()
+
+    if args.serialization:
+        serialization(args.rows, max(1, 20000 // args.rows), args.seed)
+        return
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if not database_url:
+        sys.exit("Set BENCH_DATABASE_URL to a disposable local Postgres database")
+    _check_database_url(database_url, args.allow_remote)
+    # Must be set before config is imported; keep_awake must not ping the deployed site
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["RENDER_URL"] = "http://127.0.0.1:9"
+
+    from config import engine
+    from migrations import upgrade
+
+    upgrade()
+    if args.reseed:
+        reset(engine)
+    fixture = load_fixture(engine)
+    if not fixture:
+        seed(engine, args.schools, args.students, args.history_days, args.visit_rate, args.seed)
+        fixture = load_fixture(engine)
+
+    students = sum(len(s["roster"]) for s in fixture)
+    print(f"Running '{args.mix}' for {args.duration:.0f}s with {args.concurrency} clients "
+          f"against {len(fixture)} schools / {students} students...")
+    routes = asyncio.run(drive(fixture, MIXES[args.mix], args.duration, args.warmup, args.concurrency, args.seed))
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(args.mix)
+    config = {"schools": len(fixture), "students": students, "concurrency": args.concurrency, "duration": args.duration}
+    if baseline and baseline.get("config") != config:
+        print(f"Note: baseline was recorded with {baseline.get('config')}, this run used {config}")
+
+    regressions = report(routes, (baseline or {}).get("routes"), args.threshold)
+
+    if args.save_baseline:
+        baselines[args.mix] = {"config": config, "routes": routes}
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✓ Saved baseline for '{args.mix}' to {args.baseline}")
+    elif regressions:
+        print(f"\n✗ p95 regressed by more than {args.threshold:.0f}% on: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# cache_bus.py
+"""
+Cache Bus Module
+Broadcasts cache invalidations to every worker process through Postgres
+LISTEN/NOTIFY, or only within this process when CACHE_BUS_BACKEND=memory
+"""
+import json
+import queue
+import select
+import threading
+import time
+import uuid
+
+from sqlalchemy import create_engine, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.pool import NullPool
+
+from config import engine, CACHE_BUS_BACKEND
+
+CHANNEL = "myschool_cache"
+# Pending background notifications; beyond this they are dropped with a warning
+MAX_OUTBOX = 10000
+# Pause before retrying after a failed NOTIFY
+SEND_RETRY_SECONDS = 1
+
+
+class CacheBus:
+    """Topic-based invalidation fan-out.
+
+    Caches register ``invalidate(key)`` and ``clear()`` callbacks for a topic
+    (e.g. "school", "roster", "products"). ``publish`` runs the local
+    callbacks immediately and, with the postgres backend, sends a NOTIFY that
+    the listener thread in every other worker turns into the same calls.
+    A key of None clears the whole topic. After the listener (re)connects,
+    every cache is cleared, since notifications may have been missed.
+
+    ``broadcast`` is ``publish`` for hot paths: the NOTIFY is sent by a
+    background thread (several pending ones share a connection), so the
+    caller never waits on the database. Keys must be JSON-serializable.
+    When a notification is dropped (full outbox, failed NOTIFY), the
+    background thread keeps retrying a clear of its topic, so the other
+    workers recover the same way as after a listener reconnect.
+    """
+
+    def __init__(self, backend: str = "memory"):
+        self.backend = backend
+        self.origin = uuid.uuid4().hex
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._outbox = queue.Queue(maxsize=MAX_OUTBOX)
+        self._sender = None
+        self._dropped = set()  # topics the other workers must clear
+
+    def subscribe(self, topic: str, invalidate, clear):
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append((invalidate, clear))
+
+    def publish(self, topic: str, key=None):
+        """Invalidate ``key`` (None: everything) under ``topic`` here and in every other worker"""
+        self._dispatch(topic, key)
+        if self.backend == "postgres":
+            try:
+                with engine.connect() as connection:
+                    connection.execute(sql_select(func.pg_notify(CHANNEL, self._payload(topic, key))))
+                    connection.commit()
+            except Exception as e:
+                print(f"Warning: Could not broadcast cache invalidation: {e}")
+                self._drop(topic)
+
+    def broadcast(self, topic: str, key=None):
+        """``publish`` without waiting: safe from async handlers, the NOTIFY goes out in the background"""
+        self._dispatch(topic, key)
+        if self.backend == "postgres":
+            try:
+                self._outbox.put_nowait((topic, self._payload(topic, key)))
+            except queue.Full:
+                print(f"Warning: Cache bus outbox full, dropped a '{topic}' notification")
+                self._drop(topic)
+                return
+            self._ensure_sender()
+
+    def _drop(self, topic: str):
+        with self._lock:
+            self._dropped.add(topic)
+        self._ensure_sender()
+
+    def _ensure_sender(self):
+        with self._lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send, daemon=True)
+                self._sender.start()
+
+    def start(self):
+        """Start listening for other workers' invalidations (postgres backend only)"""
+        if self.backend == "postgres" and self._listener is None:
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def _payload(self, topic: str, key) -> str:
+        return json.dumps({"origin": self.origin, "topic": topic, "key": key})
+
+    def _dispatch(self, topic: str, key):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for invalidate, clear in subscribers:
+            try:
+                if key is None:
+                    clear()
+                else:
+                    invalidate(key)
+            except Exception as e:
+                print(f"Warning: Cache invalidation for '{topic}' failed: {e}")
+
+    def _dispatch_all(self):
+        with self._lock:
+            topics = list(self._subscribers)
+        for topic in topics:
+            self._dispatch(topic, None)
+
+    def _send(self):
+        while True:
+            with self._lock:
+                retrying = bool(self._dropped)
+            messages = []
+            try:
+                messages.append(self._outbox.get(timeout=SEND_RETRY_SECONDS if retrying else None))
+            except queue.Empty:
+                pass
+            while True:
+                try:
+                    messages.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                dropped, self._dropped = self._dropped, set()
+            # Other workers missed something under these topics: have them clear (resync) it all
+            messages += [(topic, self._payload(topic, None)) for topic in sorted(dropped)]
+            try:
+                with engine.connect() as connection:
+                    for _, payload in messages:
+                        connection.execute(sql_select(func.pg_notify(CHANNEL, payload)))
+                    connection.commit()
+            except Exception as e:
+                print(f"Warning: Could not broadcast {len(messages)} cache bus notifications: {e}")
+                with self._lock:
+                    self._dropped.update(topic for topic, _ in messages)
+                time.sleep(SEND_RETRY_SECONDS)
+
+    def _listen(self):
+        # Dedicated connection outside the pool: it stays in LISTEN for the life of the process
+        listen_engine = create_engine(engine.url, poolclass=NullPool, connect_args={"sslmode": "require"})
+        while True:
+            connection = None
+            try:
+                connection = listen_engine.raw_connection()
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                dbapi_connection.cursor().execute(f"LISTEN {CHANNEL}")
+                self._dispatch_all()
+
+                while True:
+                    if select.select([dbapi_connection], [], [], 60) == ([], [], []):
+                        # Idle: a cheap round trip so a dead connection is noticed
+                        dbapi_connection.cursor().execute("SELECT 1")
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        self._receive(dbapi_connection.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"Warning: Cache bus listener disconnected: {e}")
+                time.sleep(5)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _receive(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") != self.origin:
+            self._dispatch(message.get("topic"), message.get("key"))
+
+
+cache_bus = CacheBus(CACHE_BUS_BACKEND)
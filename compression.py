@@ -0,0 +1,114 @@
+# compression.py
+"""
+Compression Module
+Compresses JSON, HTML and other text responses of at least COMPRESS_MIN_SIZE
+bytes with brotli (when the brotli package is installed) or gzip
+"""
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Images, Excel files (already zip archives) and event streams go out as they are
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/css", "text/plain", "text/javascript",
+                      "application/javascript")
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing single-message text responses.
+
+    ETags of compressed responses get an "-<encoding>" suffix, since the
+    bytes differ from the identity response's; the suffix is stripped from
+    If-None-Match on the way in, so handlers keep comparing their own tags.
+    Streamed responses (exports, live feeds) are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        suffix = f'-{encoding}"'
+        revalidating = False
+        headers = []
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                tags = value.decode("latin-1")
+                revalidating = suffix in tags
+                value = tags.replace(suffix, '"').encode("latin-1")
+            headers.append((name, value))
+        scope = dict(scope, headers=headers)
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                response_start, start = start, None
+                response_headers = MutableHeaders(raw=response_start["headers"])
+                body = message.get("body", b"")
+                etag = response_headers.get("etag")
+                if (
+                    not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                    and "content-encoding" not in response_headers
+                    and response_headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                ):
+                    body = _compress(body, encoding)
+                    response_headers["Content-Encoding"] = encoding
+                    response_headers["Content-Length"] = str(len(body))
+                    response_headers.add_vary_header("Accept-Encoding")
+                    if etag and etag.endswith('"'):
+                        response_headers["ETag"] = etag[:-1] + suffix
+                    message = dict(message, body=body)
+                elif response_start["status"] == 304 and revalidating and etag and etag.endswith('"'):
+                    # The client holds the compressed copy; confirm it under the tag it sent
+                    response_headers["ETag"] = etag[:-1] + suffix
+                await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
@@ -12,17 +14,30 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set. Please add it to your .env file.")
 
-# Configure Supabase PostgreSQL connection
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    connect_args={
-        "sslmode": "require",
-    }
-)
+# Student search backend: "memory" (per-school n-gram index), "trigram" (pg_trgm GIN index) or "db" (plain ILIKE)
+STUDENT_SEARCH_BACKEND = os.getenv("STUDENT_SEARCH_BACKEND", "memory").strip().lower()
+
+# Cache invalidation across workers: "postgres" (LISTEN/NOTIFY) or "memory" (single process / tests)
+CACHE_BUS_BACKEND = os.getenv("CACHE_BUS_BACKEND", "postgres").strip().lower()
+
+# Optional read replica for the read-only endpoints (routing lives in read_replica.py).
+# Unset, every session uses the primary; it may also be the primary's own URL, e.g. to try the routing locally.
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+
+def _create_sync_engine(url: str):
+    """Supabase PostgreSQL connection pool"""
+    return create_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        connect_args={
+            "sslmode": "require",
+        }
+    )
+
+engine = _create_sync_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -30,6 +45,44 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+def _async_database_url(url: str):
+    """Point DATABASE_URL at the asyncpg driver; SSL goes through connect_args instead of sslmode"""
+    url = make_url(url)
+    query = {k: v for k, v in url.query.items() if k != "sslmode"}
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+# Async engine for the hot request handlers, so waiting on Supabase doesn't tie up threadpool workers.
+# Set ASYNC_DB_STATEMENT_CACHE_SIZE=0 behind a transaction-mode pooler (pgbouncer / Supabase port 6543).
+def _create_async_engine(url: str):
+    return create_async_engine(
+        _async_database_url(url),
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        connect_args={
+            "ssl": "require",
+            "statement_cache_size": int(os.getenv("ASYNC_DB_STATEMENT_CACHE_SIZE", "100")),
+        }
+    )
+
+async_engine = _create_async_engine(DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+if REPLICA_DATABASE_URL:
+    replica_engine = _create_sync_engine(REPLICA_DATABASE_URL)
+    replica_async_engine = _create_async_engine(REPLICA_DATABASE_URL)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=replica_async_engine, autoflush=False, expire_on_commit=False)
+else:
+    replica_engine, replica_async_engine = engine, async_engine
+    ReplicaSessionLocal, AsyncReplicaSessionLocal = SessionLocal, AsyncSessionLocal
+
 Base = declarative_base()
 
 def get_db():
@@ -40,116 +93,7 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    """Initialize database tables - creates all tables defined in models"""
-    Base.metadata.create_all(bind=engine)
-    _ensure_products_table()
-    _ensure_student_school_id_column()
-    _ensure_visit_transport_columns()
-
-def _ensure_products_table():
-    """Create products table if it doesn't exist"""
-    from sqlalchemy import text, inspect
-    with engine.connect() as connection:
-        inspector = inspect(connection)
-        if 'products' not in inspector.get_table_names():
-            try:
-                connection.execute(text("""
-                    CREATE TABLE products (
-                        product_id SERIAL PRIMARY KEY,
-                        product_name VARCHAR(100) NOT NULL,
-                        product_price INTEGER NOT NULL,
-                        school_id INTEGER REFERENCES schools(id)
-                    )
-                """))
-                connection.commit()
-                print("✓ Created products table")
-            except Exception as e:
-                print(f"Warning: Could not create products table: {e}")
-                connection.rollback()
-
-def _ensure_student_school_id_column():
-    """Add school_id column to students table if it doesn't exist"""
-    from sqlalchemy import text, inspect
-    
-    with engine.connect() as connection:
-        inspector = inspect(connection)
-        
-        # Get columns for students table
-        if 'students' in inspector.get_table_names():
-            columns = {col['name'] for col in inspector.get_columns('students')}
-            
-            if 'school_id' not in columns:
-                try:
-                    print("Adding school_id column to students table...")
-                    connection.execute(text("ALTER TABLE students ADD COLUMN school_id INTEGER DEFAULT 1"))
-                    connection.commit()
-                    print("✓ Added school_id column")
-                    
-                    # Try to add foreign key
-                    try:
-                        connection.execute(text("""
-                            ALTER TABLE students 
-                            ADD CONSTRAINT fk_students_school_id 
-                            FOREIGN KEY (school_id) REFERENCES schools(id)
-                        """))
-                        connection.commit()
-                    except:
-                        pass
-                    
-                    # Make it NOT NULL
-                    try:
-                        connection.execute(text("ALTER TABLE students ALTER COLUMN school_id SET NOT NULL"))
-                        connection.commit()
-                    except:
-                        pass
-                        
-                except Exception as e:
-                    print(f"Warning: Could not add school_id column: {e}")
-                    connection.rollback()
-
-def _ensure_visit_transport_columns():
-    """Add transport/car columns to visits table if they don't exist"""
-    from sqlalchemy import text, inspect
-
-    with engine.connect() as connection:
-        inspector = inspect(connection)
-
-        if 'visits' in inspector.get_table_names():
-            columns = {col['name'] for col in inspector.get_columns('visits')}
-
-            if 'movement_method' not in columns:
-                try:
-                    connection.execute(text("ALTER TABLE visits ADD COLUMN movement_method VARCHAR(20)"))
-                    connection.commit()
-                    print("✓ Added movement_method column to visits table")
-                except Exception as e:
-                    print(f"Warning: Could not add movement_method column: {e}")
-                    connection.rollback()
-
-            if 'arrival_plate_number' not in columns:
-                try:
-                    connection.execute(text("ALTER TABLE visits ADD COLUMN arrival_plate_number VARCHAR(30)"))
-                    connection.commit()
-                    print("✓ Added arrival_plate_number column to visits table")
-                except Exception as e:
-                    print(f"Warning: Could not add arrival_plate_number column: {e}")
-                    connection.rollback()
-
-            if 'assigned_plate_number' not in columns:
-                try:
-                    connection.execute(text("ALTER TABLE visits ADD COLUMN assigned_plate_number VARCHAR(30)"))
-                    connection.commit()
-                    print("✓ Added assigned_plate_number column to visits table")
-                except Exception as e:
-                    print(f"Warning: Could not add assigned_plate_number column: {e}")
-                    connection.rollback()
-
-            if 'created_at' not in columns:
-                try:
-                    connection.execute(text("ALTER TABLE visits ADD COLUMN created_at TIMESTAMP DEFAULT NOW()"))
-                    connection.commit()
-                    print("✓ Added created_at column to visits table")
-                except Exception as e:
-                    print(f"Warning: Could not add created_at column: {e}")
-                    connection.rollback()
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,92 @@
+# live_feed.py
+"""
+Live Feed Module
+Publish/subscribe of visit events for the admin live-tracking stream; events
+reach subscribers in every worker through the cache bus
+"""
+import asyncio
+import json
+import threading
+
+from cache_bus import cache_bus
+
+TOPIC = "visit_feed"
+
+
+class VisitFeed:
+    """Fan out visit events to Server-Sent Events subscribers.
+
+    Subscribers are keyed by (school_id, visit_type). Publishing never blocks
+    and is safe from both sync and async handlers; events are handed to each
+    subscriber's event loop with ``call_soon_threadsafe``. If the bus may have
+    missed events (listener reconnect, dropped notification), every subscriber
+    is sent ``resync``.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, school_id: int, visit_type: str) -> asyncio.Queue:
+        """Register a subscriber; must be called from the running event loop"""
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault((school_id, visit_type), set()).add((loop, queue))
+        return queue
+
+    def unsubscribe(self, school_id: int, visit_type: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get((school_id, visit_type))
+            if not subscribers:
+                return
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                del self._subscribers[(school_id, visit_type)]
+
+    def publish(self, school_id: int, visit_type: str, event: dict):
+        """Deliver an event to every subscriber of a school and visit type, in every worker"""
+        cache_bus.broadcast(TOPIC, {"school_id": school_id, "visit_type": visit_type, "event": event})
+
+    def deliver(self, message: dict):
+        """Hand a published event to this worker's subscribers (cache bus callback)"""
+        school_id, visit_type = message["school_id"], message["visit_type"]
+        with self._lock:
+            subscribers = list(self._subscribers.get((school_id, visit_type), ()))
+        for loop, queue in subscribers:
+            self._send(school_id, visit_type, loop, queue, message["event"])
+
+    def resync_all(self):
+        """Events may have been missed: every subscriber reloads its snapshot"""
+        with self._lock:
+            subscribers = [(key, s) for key, group in self._subscribers.items() for s in group]
+        for (school_id, visit_type), (loop, queue) in subscribers:
+            self._send(school_id, visit_type, loop, queue, {"type": "resync"})
+
+    def _send(self, school_id: int, visit_type: str, loop, queue: asyncio.Queue, event: dict):
+        try:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+        except RuntimeError:
+            # Subscriber's loop has shut down
+            self.unsubscribe(school_id, visit_type, queue)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the backlog and ask the client to reload
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event dict as a Server-Sent Events message"""
+    payload = {k: v for k, v in event.items() if k != "type"}
+    return f"event: {event['type']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+visit_feed = VisitFeed()
+cache_bus.subscribe(TOPIC, visit_feed.deliver, visit_feed.resync_all)
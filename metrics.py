@@ -0,0 +1,191 @@
+# metrics.py
+"""
+Metrics Module
+Per-route request latency, per-request DB query counts/time and connection
+pool stats, rendered in the Prometheus text format for GET /metrics
+"""
+from contextvars import ContextVar
+import threading
+import time
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+# Mutable [query_count, db_seconds] for the request being served. The object
+# is shared with the threadpool/greenlet copies of the context, so sync and
+# async handlers both add to it.
+_request_db = ContextVar("request_db", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(c), n, s) for labels, (c, n, s) in self._series.items()}
+        for labels, (counts, count, total) in sorted(series.items()):
+            base = _labels(self.label_names, labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values))
+
+
+request_duration = Histogram(
+    "myschool_http_request_duration_seconds", "Request latency by route", ("method", "route"), LATENCY_BUCKETS
+)
+requests_total = Counter("myschool_http_requests_total", "Requests by route and status", ("method", "route", "status"))
+request_queries = Histogram(
+    "myschool_db_queries_per_request", "DB statements executed per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram(
+    "myschool_db_time_per_request_seconds", "Time spent in DB statements per request", ("method", "route"), LATENCY_BUCKETS
+)
+queries_total = Counter("myschool_db_queries_total", "DB statements executed, in or out of requests", ("engine",))
+pool_checkouts = Counter("myschool_db_pool_checkouts_total", "Connections checked out of the pool", ("engine",))
+pool_wait = Histogram(
+    "myschool_db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", ("engine",), POOL_WAIT_BUCKETS
+)
+
+_pools = {}
+
+
+def instrument_engine(engine, name: str):
+    """Count statements and DB time on a (sync) engine and time its pool checkouts"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_started", time.perf_counter())
+        queries_total.inc((name,))
+        stats = _request_db.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_checkouts.inc((name,))
+
+    # QueuePool has no "before checkout" event, so wrap its getter to time waits
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            pool_wait.observe((name,), time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    _pools[name] = pool
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per matched route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = [0, 0.0]
+        token = _request_db.set(stats)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db.reset(token)
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = (scope["method"], route)
+            request_duration.observe(labels, elapsed)
+            requests_total.inc(labels + (status[0],))
+            request_queries.observe(labels, stats[0])
+            request_db_time.observe(labels, stats[1])
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in (request_duration, requests_total, request_queries, request_db_time, queries_total, pool_checkouts, pool_wait):
+        lines += metric.render()
+
+    for gauge, help_text, read in (
+        ("myschool_db_pool_size", "Configured pool size", lambda p: p.size()),
+        ("myschool_db_pool_checked_out", "Connections currently checked out", lambda p: p.checkedout()),
+        ("myschool_db_pool_overflow", "Connections open beyond pool_size (negative while the pool fills)", lambda p: p.overflow()),
+    ):
+        lines += [f"# HELP {gauge} {help_text}", f"# TYPE {gauge} gauge"]
+        for name, pool in sorted(_pools.items()):
+            lines.append(f'{gauge}{{engine="{name}"}} {read(pool)}')
+    return "\n".join(lines) + "\n"
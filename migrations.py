@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Migrations Module
+Numbered schema migrations tracked in a schema_version table
+
+Startup only runs one query (the current version); migrations are applied
+when the database is behind. Run them out-of-band before a deploy with:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # show current and latest version
+
+Migration 1 creates any missing tables from the current models, so every
+later migration must be safe to run against a freshly created schema
+(IF NOT EXISTS and friends).
+"""
+import argparse
+import os
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from config import engine, Base
+import model  # noqa: F401  (registers the tables on Base.metadata)
+import system_admin  # noqa: F401
+
+# Set AUTO_MIGRATE=0 when migrations are run before deploys; startup then only warns
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") != "0"
+
+# Arbitrary pg_advisory_lock key so concurrent workers don't migrate at the same time
+MIGRATION_LOCK_KEY = 720913
+
+
+def _create_tables(connection):
+    Base.metadata.create_all(bind=connection)
+
+
+def _add_student_school_id(connection):
+    # Formerly migrate_add_school_id.py; existing rows default to school 1
+    connection.execute(text("""
+        ALTER TABLE students
+        ADD COLUMN IF NOT EXISTS school_id INTEGER DEFAULT 1
+        CONSTRAINT fk_students_school_id REFERENCES schools(id)
+    """))
+
+
+def _add_visit_transport_columns(connection):
+    for column in (
+        "movement_method VARCHAR(20)",
+        "arrival_plate_number VARCHAR(30)",
+        "assigned_plate_number VARCHAR(30)",
+        "created_at TIMESTAMP DEFAULT NOW()",
+    ):
+        connection.execute(text(f"ALTER TABLE visits ADD COLUMN IF NOT EXISTS {column}"))
+
+
+def _add_visit_indexes(connection):
+    exists = connection.execute(text(
+        "SELECT 1 FROM pg_indexes WHERE indexname = 'uq_visits_student_type_date'"
+    )).first()
+    if not exists:
+        # Drop duplicates left by earlier races, keeping the first record. Each removal is logged
+        # as a "deleted" visit change so incremental admin_data clients drop the row too.
+        removed = connection.execute(text("""
+            WITH removed AS (
+                DELETE FROM visits a USING visits b
+                WHERE a.student_id = b.student_id
+                  AND a.visit_type = b.visit_type
+                  AND a.visit_date = b.visit_date
+                  AND a.id > b.id
+                RETURNING a.id, a.student_id, a.visit_type, a.visit_date
+            ), logged AS (
+                INSERT INTO visit_changes (school_id, visit_id, visit_type, visit_date, action, created_at)
+                SELECT sc.id, r.id, r.visit_type, r.visit_date, 'deleted', NOW()
+                FROM removed r
+                JOIN students s ON s.id = r.student_id
+                -- Students without a school were listed by every school
+                JOIN schools sc ON sc.id = s.school_id OR s.school_id IS NULL
+            )
+            SELECT id FROM removed ORDER BY id
+        """)).scalars().all()
+        connection.execute(text(
+            "CREATE UNIQUE INDEX uq_visits_student_type_date ON visits (student_id, visit_type, visit_date)"
+        ))
+        print(f"  removed {len(removed)} duplicate visits")
+        if removed:
+            print(f"  removed visit ids: {', '.join(str(visit_id) for visit_id in removed)}")
+
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_visits_type_date ON visits (visit_type, visit_date)"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_students_school_class_name ON students (school_id, class_name, student_name)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_visit_changes_school_type ON visit_changes (school_id, visit_type, id)"
+    ))
+
+
+def _backfill_visit_counts(connection):
+    if connection.execute(text("SELECT EXISTS (SELECT 1 FROM visit_counts)")).scalar():
+        return
+    added = connection.execute(text("""
+        INSERT INTO visit_counts (school_id, class_name, visit_type, visit_date, total, with_car, without_car)
+        SELECT s.school_id, s.class_name, v.visit_type, v.visit_date,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE v.movement_method = 'with_car'),
+               COUNT(*) FILTER (WHERE v.movement_method = 'without_car')
+        FROM visits v JOIN students s ON s.id = v.student_id
+        WHERE s.school_id IS NOT NULL
+        GROUP BY s.school_id, s.class_name, v.visit_type, v.visit_date
+    """)).rowcount
+    print(f"  backfilled {added} visit_counts rows")
+
+
+def _add_student_name_trigram_index(connection):
+    # pg_trgm may not be available everywhere; STUDENT_SEARCH_BACKEND=trigram needs it
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_students_name_trgm ON students USING gin (student_name gin_trgm_ops)"
+            ))
+    except Exception as e:
+        print(f"Warning: Could not create trigram index on students: {e}")
+
+
+def _create_visits_archive(connection):
+    model.VisitArchive.__table__.create(bind=connection, checkfirst=True)
+
+
+def _require_school_ids(connection):
+    orphans = connection.execute(text("SELECT COUNT(*) FROM students WHERE school_id IS NULL")).scalar()
+    if orphans:
+        # Migration 2 defaulted existing students to school 1; fall back to the oldest school
+        school_id = connection.execute(text(
+            "SELECT COALESCE(MIN(id) FILTER (WHERE id = 1), MIN(id)) FROM schools"
+        )).scalar()
+        if school_id is None:
+            raise RuntimeError(f"{orphans} students have no school and there is no school to assign them to")
+        connection.execute(text("UPDATE students SET school_id = :school_id WHERE school_id IS NULL"),
+                           {"school_id": school_id})
+        # Their visits were counted under whichever school recorded them; recount from the rows
+        connection.execute(text("DELETE FROM visit_counts"))
+        connection.execute(text("""
+            INSERT INTO visit_counts (school_id, class_name, visit_type, visit_date, total, with_car, without_car)
+            SELECT s.school_id, s.class_name, v.visit_type, v.visit_date,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE v.movement_method = 'with_car'),
+                   COUNT(*) FILTER (WHERE v.movement_method = 'without_car')
+            FROM (
+                SELECT student_id, visit_type, visit_date, movement_method FROM visits
+                UNION ALL
+                SELECT student_id, visit_type, visit_date, movement_method FROM visits_archive
+            ) v JOIN students s ON s.id = v.student_id
+            GROUP BY s.school_id, s.class_name, v.visit_type, v.visit_date
+        """))
+        print(f"  assigned {orphans} students to school {school_id}")
+
+    # Products without a school were listed by every school: give each school its own copy
+    copied = connection.execute(text("""
+        INSERT INTO products (product_name, product_price, school_id)
+        SELECT p.product_name, p.product_price, s.id
+        FROM products p CROSS JOIN schools s
+        WHERE p.school_id IS NULL
+        ORDER BY p.product_id, s.id
+    """)).rowcount
+    if copied:
+        connection.execute(text("DELETE FROM products WHERE school_id IS NULL"))
+        print(f"  copied shared products into {copied} per-school rows")
+
+    connection.execute(text("ALTER TABLE students ALTER COLUMN school_id SET NOT NULL, ALTER COLUMN school_id DROP DEFAULT"))
+    connection.execute(text("ALTER TABLE products ALTER COLUMN school_id SET NOT NULL"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_students_school ON students (school_id, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_products_school ON products (school_id, product_id)"))
+
+
+def _add_visit_change_txids(connection):
+    # Entries logged before this point get the migration's own transaction id
+    connection.execute(text("""
+        ALTER TABLE visit_changes
+        ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT (pg_current_xact_id()::text::bigint)
+    """))
+    connection.execute(text("DROP INDEX IF EXISTS ix_visit_changes_school_type"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_visit_changes_school_type_txid ON visit_changes (school_id, visit_type, txid)"
+    ))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_visit_changes_created_at ON visit_changes (created_at)"))
+
+
+def _add_roster_change_txids(connection):
+    connection.execute(text("""
+        ALTER TABLE roster_changes
+        ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT (pg_current_xact_id()::text::bigint)
+    """))
+    connection.execute(text("DROP INDEX IF EXISTS ix_roster_changes_school"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_roster_changes_school_txid ON roster_changes (school_id, txid)"
+    ))
+
+
+# (version, description, apply) - append only, never renumber
+MIGRATIONS = [
+    (1, "create missing tables", _create_tables),
+    (2, "add students.school_id", _add_student_school_id),
+    (3, "add visit transport columns", _add_visit_transport_columns),
+    (4, "add visit and student indexes", _add_visit_indexes),
+    (5, "backfill visit_counts", _backfill_visit_counts),
+    (6, "add trigram index on student names", _add_student_name_trigram_index),
+    (7, "create visits_archive", _create_visits_archive),
+    (8, "require students.school_id and products.school_id", _require_school_ids),
+    (9, "add visit_changes.txid", _add_visit_change_txids),
+    (10, "add roster_changes.txid", _add_roster_change_txids),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version() -> int:
+    """Schema version recorded in the database, 0 if never migrated"""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        except ProgrammingError:
+            return 0
+
+
+def upgrade():
+    """Apply pending migrations in order, each in its own transaction"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(100) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT NOW()
+                )
+            """))
+            connection.commit()
+
+            # Re-read under the lock: another worker may have migrated meanwhile
+            current = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+            for version, description, apply in MIGRATIONS:
+                if version <= current:
+                    continue
+                print(f"Applying migration {version}: {description}...")
+                apply(connection)
+                connection.execute(
+                    text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                    {"version": version, "description": description}
+                )
+                connection.commit()
+                print(f"✓ Migration {version} applied")
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+
+
+def ensure_schema():
+    """Startup check: a single version query, migrating only when behind"""
+    current = current_version()
+    if current >= LATEST_VERSION:
+        return
+    if not AUTO_MIGRATE:
+        print(f"Warning: Database schema is at version {current}, expected {LATEST_VERSION}. Run: python migrations.py")
+        return
+    upgrade()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply MySchool database migrations")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(f"Database schema version: {current_version()} (latest: {LATEST_VERSION})")
+    else:
+        upgrade()
+        print(f"✓ Database schema is at version {LATEST_VERSION}")
@@ -1,6 +1,6 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Date, ForeignKey, DateTime, Index, UniqueConstraint, select, union_all, text
+from sqlalchemy.orm import relationship, aliased
 from config import Base
 from datetime import datetime
 
@@ -10,7 +10,12 @@ class Student(Base):
     id = Column(Integer, primary_key=True, index=True)
     student_name = Column(String(100), nullable=False, index=True)
     class_name = Column(String(50), nullable=False)
-    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True, default=1)  # Made nullable for migration compatibility
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_students_school", "school_id", "id"),
+        Index("ix_students_school_class_name", "school_id", "class_name", "student_name"),
+    )
 
     # One-to-many relationship with visits
     visits = relationship(
@@ -25,7 +30,11 @@ class Product(Base):
     product_id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String(100), nullable=False)
     product_price = Column(Integer, nullable=False)
-    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_products_school", "school_id", "product_id"),
+    )
 
 
 class Visit(Base):
@@ -42,5 +51,96 @@ class Visit(Base):
     assigned_plate_number = Column(String(30), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
 
+    __table_args__ = (
+        # One visit per student, type and day; also serves the add_visit lookup
+        UniqueConstraint("student_id", "visit_type", "visit_date", name="uq_visits_student_type_date"),
+        Index("ix_visits_type_date", "visit_type", "visit_date"),
+    )
+
     # Link back to Student
     student = relationship("Student", back_populates="visits")
+
+
+class VisitArchive(Base):
+    """Visits older than VISIT_ARCHIVE_AFTER_DAYS, moved out of the hot visits table by archive.py"""
+    __tablename__ = "visits_archive"
+
+    # Same columns, in the same order, as visits; ids are kept from the original rows
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    visit_type = Column(String(30), nullable=False)
+    visit_date = Column(Date, nullable=False)
+    status = Column(String(20), default="waiting")
+    movement_method = Column(String(20), nullable=True)
+    arrival_plate_number = Column(String(30), nullable=True)
+    assigned_plate_number = Column(String(30), nullable=True)
+    created_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_visits_archive_type_date", "visit_type", "visit_date"),
+        Index("ix_visits_archive_student", "student_id"),
+    )
+
+
+# Visits across the hot and archive tables, usable like Visit in column queries
+# (VisitHistory.visit_date, ...). Postgres pushes filters into both branches.
+VisitHistory = aliased(
+    Visit,
+    union_all(
+        select(*Visit.__table__.c),
+        select(*[VisitArchive.__table__.c[c.name] for c in Visit.__table__.c]),
+    ).subquery("visit_history"),
+    name="visit_history",
+)
+
+
+class VisitChange(Base):
+    """Log of inserted/updated/deleted visits, read by admin_data's incremental mode.
+
+    ``txid`` is the writing transaction's id: unlike ``id``, it lets readers
+    tell which entries can still appear, whatever order transactions commit in.
+    """
+    __tablename__ = "visit_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+    visit_id = Column(Integer, nullable=False)
+    visit_type = Column(String(30), nullable=False)
+    visit_date = Column(Date, nullable=False)
+    action = Column(String(10), nullable=False)  # inserted | updated | deleted
+    txid = Column(BigInteger, nullable=False, server_default=text("(pg_current_xact_id()::text::bigint)"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+
+    __table_args__ = (
+        Index("ix_visit_changes_school_type_txid", "school_id", "visit_type", "txid"),
+        Index("ix_visit_changes_created_at", "created_at"),
+    )
+
+
+class VisitCount(Base):
+    """Daily visit totals per school and class, kept in step with the visits table"""
+    __tablename__ = "visit_counts"
+
+    school_id = Column(Integer, ForeignKey("schools.id"), primary_key=True)
+    class_name = Column(String(50), primary_key=True)
+    visit_type = Column(String(30), primary_key=True)
+    visit_date = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    with_car = Column(Integer, nullable=False, default=0)
+    without_car = Column(Integer, nullable=False, default=0)
+
+
+class RosterChange(Base):
+    """Students added to/removed from a school's roster, stamped with the writing transaction's id"""
+    __tablename__ = "roster_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
+    student_id = Column(Integer, nullable=False)
+    action = Column(String(10), nullable=False)  # added | removed
+    txid = Column(BigInteger, nullable=False, server_default=text("(pg_current_xact_id()::text::bigint)"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+
+    __table_args__ = (
+        Index("ix_roster_changes_school_txid", "school_id", "txid"),
+    )
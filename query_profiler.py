@@ -0,0 +1,70 @@
+# query_profiler.py
+"""
+Query Profiler Module
+Development-mode statement counter and N+1 detector, enabled with QUERY_PROFILE=1
+"""
+from collections import Counter
+from contextvars import ContextVar
+import os
+import re
+
+from sqlalchemy import event
+
+ENABLED = os.getenv("QUERY_PROFILE", "0") == "1"
+# Warn when one statement shape runs this many times in a single request
+REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILE_REPEAT_THRESHOLD", "5"))
+
+# Statement shapes seen by the request being served (shared with threadpool/greenlet context copies)
+_request_statements = ContextVar("request_statements", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _shape(statement: str) -> str:
+    # Bound parameters are already placeholders; only layout differs between runs
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def instrument_engine(engine):
+    """Record every statement executed on a (sync) engine against the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements = _request_statements.get()
+        if statements is not None:
+            statements[_shape(statement)] += 1
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware adding X-Query-Count and printing a warning on repeated statements"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements = Counter()
+        token = _request_statements.set(statements)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                # Statements issued while streaming the body are not in the header, only in the warning
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(sum(statements.values())).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _request_statements.reset(token)
+            repeated = [(shape, n) for shape, n in statements.most_common() if n >= REPEAT_THRESHOLD]
+            if repeated:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                print(f"Warning: Possible N+1 in {scope['method']} {route}: "
+                      f"{sum(statements.values())} statements")
+                for shape, n in repeated:
+                    print(f"  {n}x {shape[:200]}")
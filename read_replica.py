@@ -0,0 +1,134 @@
+# read_replica.py
+"""
+Read Replica Module
+Sends the read-only endpoints to REPLICA_DATABASE_URL, except for a school
+that wrote within the last READ_YOUR_WRITES_SECONDS, which reads from the
+primary so replication lag never hides its own changes
+
+Locally, REPLICA_DATABASE_URL=$DATABASE_URL gives the replica its own pool on
+the same database; with METRICS_TOKEN set, /metrics then shows which engine
+("replica", "replica_async" or the primary's "sync"/"async") served reads.
+"""
+import os
+import threading
+import time
+
+from starlette.routing import Match
+
+from config import REPLICA_DATABASE_URL, SessionLocal, AsyncSessionLocal, ReplicaSessionLocal, AsyncReplicaSessionLocal
+from cache_bus import cache_bus
+
+ENABLED = bool(REPLICA_DATABASE_URL)
+# Should comfortably exceed the replica's usual lag
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RecentWrites:
+    """Per-school deadline until which reads must go to the primary"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._until = {}
+        self._all_until = 0.0
+        self._lock = threading.Lock()
+
+    def mark(self, school_name: str):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) > 4096:
+                self._until = {name: until for name, until in self._until.items() if until > now}
+            self._until[school_name] = now + self.window
+
+    def mark_all(self):
+        # Writes from other workers may have been missed (cache bus reconnect)
+        with self._lock:
+            self._all_until = time.monotonic() + self.window
+            self._until.clear()
+
+    def recent(self, school_name: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._all_until:
+                return True
+            until = self._until.get(school_name)
+            if until is not None and until <= now:
+                del self._until[school_name]
+                until = None
+        return until is not None
+
+
+recent_writes = RecentWrites(READ_YOUR_WRITES_SECONDS)
+# Every worker learns about a school's writes, whichever worker served them
+cache_bus.subscribe("writes", recent_writes.mark, recent_writes.mark_all)
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware recording write requests to /{school_name}/ routes as writes by that school.
+
+    The mark is taken locally before the handler runs and broadcast to the
+    other workers in the background, at most every quarter window per
+    school, so writes never wait on the database for it (other workers keep
+    a window of at least three quarters of READ_YOUR_WRITES_SECONDS).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._broadcast_at = {}
+
+    async def __call__(self, scope, receive, send):
+        school_name = None
+        if scope["type"] == "http" and scope["method"] not in _SAFE_METHODS:
+            school_name = _tenant(scope)
+        if school_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._record(school_name)
+        started = time.monotonic()
+
+        async def send_after_marking(message):
+            if message["type"] == "http.response.start" and time.monotonic() - started > recent_writes.window / 2:
+                # Slow write (e.g. a roster upload): restart the window from about its commit
+                self._record(school_name)
+            await send(message)
+
+        await self.app(scope, receive, send_after_marking)
+
+    def _record(self, school_name: str):
+        now = time.monotonic()
+        if len(self._broadcast_at) > 4096:
+            self._broadcast_at.clear()
+        if now - self._broadcast_at.get(school_name, float("-inf")) >= recent_writes.window / 4:
+            self._broadcast_at[school_name] = now
+            cache_bus.broadcast("writes", school_name)  # marks this worker immediately too
+        else:
+            recent_writes.mark(school_name)
+
+
+def _tenant(scope) -> str | None:
+    """School name when the request routes to a /{school_name}/ endpoint, None otherwise"""
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            if getattr(route, "path", "").startswith("/{school_name}/"):
+                return child_scope["path_params"]["school_name"]
+            return None
+    return None
+
+
+def get_read_db(school_name: str):
+    """get_db for read-only routes: the replica, or the primary right after this school wrote"""
+    db = SessionLocal() if recent_writes.recent(school_name) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(school_name: str):
+    """get_async_db for read-only routes: the replica, or the primary right after this school wrote"""
+    session_factory = AsyncSessionLocal if recent_writes.recent(school_name) else AsyncReplicaSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,121 @@
+# search_index.py
+"""
+Student Search Module
+Per-school in-memory n-gram index serving the parent portal autocomplete
+"""
+from collections import OrderedDict
+import heapq
+import threading
+
+NGRAM = 3
+
+
+def _ngrams(text: str, n: int):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class StudentSearchIndex:
+    """Case-insensitive substring search over one school's roster.
+
+    Every 1..NGRAM character slice of each name is indexed, so a query of up
+    to NGRAM characters is a single lookup and longer queries intersect the
+    postings of their trigrams before the candidates are verified.
+    """
+
+    def __init__(self, students):
+        self._students = [
+            {"id": s.id, "student_name": s.student_name, "class_name": s.class_name}
+            for s in students
+        ]
+        self._names = [s["student_name"].lower() for s in self._students]
+        self._postings = {}
+        for idx, name in enumerate(self._names):
+            for n in range(1, NGRAM + 1):
+                for gram in _ngrams(name, n):
+                    self._postings.setdefault(gram, set()).add(idx)
+
+    def __len__(self):
+        return len(self._students)
+
+    def search(self, query: str, limit: int = 20) -> list:
+        q = query.strip().lower()
+        if not q:
+            return []
+        if len(q) <= NGRAM:
+            candidates = self._postings.get(q, set())
+        else:
+            postings = sorted((self._postings.get(g, set()) for g in _ngrams(q, NGRAM)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+            candidates = [idx for idx in candidates if q in self._names[idx]]
+
+        ranked = heapq.nsmallest(limit, candidates, key=lambda idx: self._rank(q, self._names[idx]))
+        return [self._students[idx] for idx in ranked]
+
+    @staticmethod
+    def _rank(q: str, name: str):
+        # Exact match, then name prefix, then word prefix, then any substring
+        position = name.find(q)
+        if name == q:
+            tier = 0
+        elif position == 0:
+            tier = 1
+        elif name[position - 1] == " ":
+            tier = 2
+        else:
+            tier = 3
+        return tier, position, name
+
+
+class StudentSearchCache:
+    """Lazily built per-school indexes with explicit invalidation.
+
+    ``get`` never blocks on a build: a cold school returns None (callers fall
+    back to the database) and the roster is loaded in a background thread.
+    """
+
+    def __init__(self, load_roster, max_schools: int = 256):
+        self._load_roster = load_roster
+        self.max_schools = max_schools
+        self._indexes = OrderedDict()
+        self._generations = {}
+        self._building = set()
+        self._lock = threading.Lock()
+
+    def get(self, school_id: int):
+        with self._lock:
+            index = self._indexes.get(school_id)
+            if index is not None:
+                self._indexes.move_to_end(school_id)
+                return index
+            if school_id in self._building:
+                return None
+            self._building.add(school_id)
+            generation = self._generations.get(school_id, 0)
+        threading.Thread(target=self._build, args=(school_id, generation), daemon=True).start()
+        return None
+
+    def invalidate(self, school_id: int):
+        with self._lock:
+            self._indexes.pop(school_id, None)
+            self._generations[school_id] = self._generations.get(school_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            for school_id in set(self._indexes) | self._building:
+                self._generations[school_id] = self._generations.get(school_id, 0) + 1
+            self._indexes.clear()
+
+    def _build(self, school_id: int, generation: int):
+        try:
+            index = StudentSearchIndex(self._load_roster(school_id))
+        except Exception as e:
+            print(f"Warning: Could not build search index for school {school_id}: {e}")
+            index = None
+        with self._lock:
+            self._building.discard(school_id)
+            # Drop the result if the roster changed while it was loading
+            if index is None or self._generations.get(school_id, 0) != generation:
+                return
+            self._indexes[school_id] = index
+            while len(self._indexes) > self.max_schools:
+                self._indexes.popitem(last=False)
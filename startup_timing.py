@@ -0,0 +1,81 @@
+# startup_timing.py
+"""
+Startup Timing Module
+Opt-in boot profile for app.py, enabled with STARTUP_TIMING=1
+
+Besides the coarse steps marked by app.py, every first-time import is timed
+(like ``python -X importtime``), so the report can name the module that made
+boot slow - including lazy imports done while serving the first request.
+"""
+import builtins
+import os
+import sys
+import time
+
+ENABLED = os.getenv("STARTUP_TIMING", "0") == "1"
+# Imports faster than this, or nested deeper than this, are left out of the report
+IMPORT_REPORT_MIN_MS = float(os.getenv("STARTUP_TIMING_MIN_MS", "5"))
+IMPORT_REPORT_DEPTH = int(os.getenv("STARTUP_TIMING_DEPTH", "2"))
+
+_started = time.perf_counter()
+_last = _started
+_steps = []
+_first_request_seen = False
+
+_imports = []  # [depth, module, seconds], in the order the imports started
+_depth = 0
+_original_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    entry = [_depth, name, 0.0]
+    _imports.append(entry)
+    _depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth -= 1
+        entry[2] = time.perf_counter() - started
+
+
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+
+def mark(label: str):
+    """Record the time spent since the previous mark under ``label``"""
+    global _last
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    _steps.append((label, now - _last))
+    _last = now
+
+
+def report(title: str = "Startup timing"):
+    """Print the recorded steps, the slowest imports and the total since app.py started importing"""
+    if not ENABLED:
+        return
+    total = time.perf_counter() - _started
+    print(f"=== {title} ({total * 1000:.0f} ms, {len(sys.modules)} modules loaded) ===")
+    for label, seconds in _steps:
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms")
+    print(f"  imports (cumulative, >= {IMPORT_REPORT_MIN_MS:g} ms):")
+    for depth, module, seconds in list(_imports):
+        if depth <= IMPORT_REPORT_DEPTH and seconds * 1000 >= IMPORT_REPORT_MIN_MS:
+            name = "  " * depth + module
+            print(f"    {name:<40} {seconds * 1000:8.1f} ms")
+
+
+def first_request():
+    """Report once, after the first request has been served"""
+    global _first_request_seen
+    if not ENABLED or _first_request_seen:
+        return
+    _first_request_seen = True
+    mark("first request")
+    report("Ready")
@@ -1,4 +1,4 @@
-const CACHE = 'myschool-v2';
+const CACHE = 'myschool-v3';  // bumped to drop cached full-roster responses
 
 self.addEventListener('install', e => {
     self.skipWaiting();
@@ -12,26 +12,8 @@ self.addEventListener('activate', e => {
 });
 
 self.addEventListener('fetch', e => {
-    const url = new URL(e.request.url);
-
-    // Cache student search and student list responses
-    if (e.request.method === 'GET' && (
-        url.pathname.includes('/students/search') ||
-        url.pathname.includes('/admin/students')
-    )) {
-        e.respondWith(
-            fetch(e.request)
-                .then(res => {
-                    const clone = res.clone();
-                    caches.open(CACHE).then(c => c.put(e.request, clone));
-                    return res;
-                })
-                .catch(() => caches.match(e.request))
-        );
-        return;
-    }
-
-    // For everything else, network first, fallback to cache
+    // Network first, fallback to cache. Rosters are not cached here: pages keep
+    // their own copy current through /students/sync
     if (e.request.method === 'GET') {
         e.respondWith(
             fetch(e.request).catch(() => caches.match(e.request))
@@ -0,0 +1,47 @@
+# static_assets.py
+"""
+Static Assets Module
+Fingerprints the files under static/ at startup so pages can link to
+name.<hash>.ext URLs that are cached as immutable; plain URLs keep working
+and are revalidated on every use
+"""
+import hashlib
+import os
+
+from fastapi.staticfiles import StaticFiles
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Must keep a stable URL: browsers look the service worker up by its script URL
+NEVER_FINGERPRINT = {"sw.js"}
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles that also serves each file as name.<hash>.ext with immutable caching"""
+
+    def __init__(self, directory: str, mount_path: str = "/static"):
+        super().__init__(directory=directory)
+        self.mount_path = mount_path
+        self.fingerprinted = {}  # "sos.webp" -> "sos.3f2a1b9c0d.webp"
+        self._originals = {}     # and back
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+                if name in NEVER_FINGERPRINT:
+                    continue
+                with open(os.path.join(root, name), "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:10]
+                stem, ext = os.path.splitext(path)
+                self.fingerprinted[path] = f"{stem}.{digest}{ext}"
+                self._originals[f"{stem}.{digest}{ext}"] = path
+
+    def url(self, path: str) -> str:
+        """URL for a static file: fingerprinted when it was found at startup, plain otherwise"""
+        return f"{self.mount_path}/{self.fingerprinted.get(path, path)}"
+
+    async def get_response(self, path: str, scope):
+        original = self._originals.get(path)
+        response = await super().get_response(original or path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE if original else REVALIDATE
+        return response
@@ -7,7 +7,8 @@ from sqlalchemy import Column, Integer, String, DateTime, create_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import os
-from config import Base
+from config import Base, SessionLocal
+from cache_bus import cache_bus
 
 class School(Base):
     """System level - stores all registered schools"""
@@ -70,6 +71,43 @@ def list_all_schools():
     return school_databases
 
 
+def refresh_school_database(school_name: str):
+    """Re-read one school's entry after another worker created or deleted it"""
+    db = SessionLocal()
+    try:
+        school = db.query(School).filter(School.school_name == school_name).first()
+    finally:
+        db.close()
+    if school is None:
+        school_databases.pop(school_name, None)
+    else:
+        school_databases[school_name] = {
+            "school_code": school.school_code,
+            "created_at": school.created_at,
+            "active": bool(school.is_active),
+        }
+
+
+def reload_school_databases():
+    """Rebuild every entry from the schools table"""
+    db = SessionLocal()
+    try:
+        schools = db.query(School).all()
+    finally:
+        db.close()
+    school_databases.clear()
+    for school in schools:
+        school_databases[school.school_name] = {
+            "school_code": school.school_code,
+            "created_at": school.created_at,
+            "active": bool(school.is_active),
+        }
+
+
+# Keep school_databases in step with schools created/deleted by other workers
+cache_bus.subscribe("school", refresh_school_database, reload_school_databases)
+
+
 def delete_school_database(school_name: str):
     """Delete a school's database"""
     if school_name not in school_databases:
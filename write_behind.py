@@ -0,0 +1,91 @@
+# write_behind.py
+"""
+Write-Behind Module
+Groups concurrent writes into one transaction per batch (group commit)
+"""
+import asyncio
+
+
+class QueueFull(Exception):
+    """Raised by submit when the pending queue is at capacity"""
+
+
+class GroupCommitQueue:
+    """Bounded queue flushed in batches by a single background task.
+
+    ``submit`` waits for the flush that contains its item and returns that
+    item's result, so callers keep request/response semantics while the
+    database sees one transaction per batch. A batch is flushed once
+    ``max_batch`` items are waiting or ``max_delay`` seconds after its first
+    item arrived. ``flush(items)`` must return one result per item; if it
+    raises, every item in the batch gets the exception.
+    """
+
+    def __init__(self, flush, max_batch: int = 100, max_delay: float = 0.005, max_pending: int = 1000):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    async def submit(self, item):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise QueueFull() from None
+        return await future
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = loop.create_task(self._run(self._queue))
+
+    async def _run(self, queue: asyncio.Queue):
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = self._loop.time() + self.max_delay
+                while len(batch) < self.max_batch:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._flush_batch(batch)
+                batch = []
+        finally:
+            # The next submit starts a new worker and queue: fail everything this one still
+            # holds, or those callers would wait forever
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            error = RuntimeError("Write queue worker stopped")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _flush_batch(self, batch: list):
+        try:
+            results = await self.flush([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"flush returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            # The request may have been cancelled (client went away) while waiting
+            if not future.done():
+                future.set_result(result)